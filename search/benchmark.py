@@ -0,0 +1,202 @@
+# benchmark.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Timing harness for the search code on generated mazes.
+
+> python benchmark.py --sizes 41,81,161,321
+> python benchmark.py --problem CornersProblem --loops 1 --sizes 81,161,321
+
+generates one maze per size (Pacman in the middle, food in the four
+corners) and times the same breadth first search with a list-backed FIFO
+frontier and with the deque-backed util.Queue.  The list frontier costs
+O(frontier) per push, but the frontier of a search on a grid only grows
+with the border of the area searched: at most a few hundred states even on
+a 321x321 maze, with --loops 1 or CornersProblem.  Shifting that few is
+about as cheap as a deque append, so the maze table shows no gap (ratios
+around 1.0).  The second table times the two queues alone against standing
+frontiers of --frontiers items, and that is where O(n) against O(1) shows.
+"""
+
+import random
+import sys
+import time
+from optparse import OptionParser
+
+import layout
+import pacman
+import util
+from searchAgents import PositionSearchProblem, CornersProblem
+
+def generateMazeText(width, height, seed=0, loops=0.0):
+    """
+    Returns the rows of a layout for a random perfect maze (a recursive
+    backtracker carved on the odd cells), Pacman on the central odd cell and a
+    food dot in each corner.  'loops' is the fraction of extra
+    walls knocked down afterwards, which opens cycles in the maze; 1.0 leaves
+    only the pillars on the even cells standing.
+
+    width and height are forced to odd values of at least 5.
+    """
+    width = max(5, width | 1)
+    height = max(5, height | 1)
+    rng = random.Random(seed)
+    cells = [['%'] * width for _ in range(height)]
+    cells[1][1] = ' '
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        options = []
+        for dx, dy in ((0, 2), (0, -2), (2, 0), (-2, 0)):
+            nx, ny = x + dx, y + dy
+            if 0 < nx < width - 1 and 0 < ny < height - 1 and cells[ny][nx] == '%':
+                options.append((nx, ny))
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = rng.choice(options)
+        cells[(y + ny) / 2][(x + nx) / 2] = ' '
+        cells[ny][nx] = ' '
+        stack.append((nx, ny))
+    for _ in range(int(loops * width * height / 4)):
+        x = rng.randrange(1, width - 1)
+        y = rng.randrange(1, height - 1)
+        if (x + y) % 2 == 1:
+            cells[y][x] = ' '
+    cells[1][1] = cells[1][width - 2] = cells[height - 2][1] = cells[height - 2][width - 2] = '.'
+    cells[(height / 2) | 1][(width / 2) | 1] = 'P'
+    return [''.join(row) for row in cells]
+
+def generateMazeState(width, height, seed=0, loops=0.0):
+    "Returns a pacman.GameState for a maze made by generateMazeText"
+    lay = layout.Layout(generateMazeText(width, height, seed, loops))
+    state = pacman.GameState()
+    state.initialize(lay, 0)
+    return state
+
+def mazeCorners(state):
+    "Returns the four inner corners of the board, as CornersProblem sees them"
+    walls = state.getWalls()
+    top, right = walls.height - 2, walls.width - 2
+    return ((1, 1), (1, top), (right, 1), (right, top))
+
+class ListQueue:
+    "The list-backed FIFO util.Queue used to be: O(n) insert at the front."
+    def __init__(self):
+        self.list = []
+
+    def push(self, item):
+        self.list.insert(0, item)
+
+    def pop(self):
+        return self.list.pop()
+
+    def isEmpty(self):
+        return len(self.list) == 0
+
+def frontierBreadthFirstSearch(problem, frontier):
+    """
+    Breadth first search identical to search.breadthFirstSearch except for the
+    FIFO container, which is passed in.  Returns the number of actions found
+    and the largest size the frontier reached.
+    """
+    start = problem.getStartState()
+    depth = {start: 0}
+    frontier.push(start)
+    peak = 1
+    while not frontier.isEmpty():
+        peak = max(peak, len(frontier.list))
+        v = frontier.pop()
+        if problem.isGoalState(v):
+            return depth[v], peak
+        for w, action, cost in problem.getSuccessors(v):
+            if w not in depth:
+                depth[w] = depth[v] + 1
+                frontier.push(w)
+    return None, peak
+
+def timeCall(function, *args):
+    start = time.time()
+    result = function(*args)
+    return result, time.time() - start
+
+def makeProblem(problemType, state):
+    if problemType == 'CornersProblem':
+        return CornersProblem(state)
+    goal = mazeCorners(state)[3]
+    return PositionSearchProblem(state, goal=goal, warn=False, visualize=False)
+
+def benchmarkFifo(sizes, problemType='PositionSearchProblem', seed=0, loops=0.1):
+    """
+    Runs breadth first search on one generated maze per size, once with the
+    list-backed frontier and once with util.Queue, and prints the timings.
+    Both runs use frontierBreadthFirstSearch, so only the container differs.
+    """
+    print '%8s %8s %10s %10s %12s %12s %8s' % ('size', 'cells', 'expanded', 'frontier',
+                                              'list (s)', 'deque (s)', 'ratio')
+    for n in sizes:
+        state = generateMazeState(n, n, seed, loops)
+        cells = state.getWalls().count(False)
+        (listLength, peak), listTime = timeCall(frontierBreadthFirstSearch,
+                                                makeProblem(problemType, state), ListQueue())
+        problem = makeProblem(problemType, state)
+        (dequeLength, _), dequeTime = timeCall(frontierBreadthFirstSearch, problem, util.Queue())
+        assert listLength == dequeLength, 'frontiers disagree on the path length'
+        print '%8d %8d %10d %10d %12.3f %12.3f %8.1f' % (n, cells, problem._expanded, peak, listTime,
+                                                         dequeTime, listTime / max(dequeTime, 1e-6))
+
+def benchmarkQueues(frontierSizes, operations=100000):
+    """
+    Times 'operations' push/pop pairs against a frontier that already holds
+    the given number of items, for the list-backed queue and util.Queue.  This
+    isolates the per-operation cost that the search timings above dilute with
+    successor generation.
+    """
+    print '%10s %12s %12s %8s' % ('frontier', 'list (s)', 'deque (s)', 'ratio')
+    for k in frontierSizes:
+        times = []
+        for queue in (ListQueue(), util.Queue()):
+            for i in xrange(k):
+                queue.push(i)
+            start = time.time()
+            for i in xrange(operations):
+                queue.push(i)
+                queue.pop()
+            times.append(time.time() - start)
+        print '%10d %12.3f %12.3f %8.1f' % (k, times[0], times[1], times[0] / max(times[1], 1e-6))
+
+def readCommand(argv):
+    parser = OptionParser()
+    parser.add_option('--sizes', dest='sizes', default='41,81,161,321',
+                      help='comma separated side lengths of the generated mazes')
+    parser.add_option('--problem', dest='problem', default='PositionSearchProblem',
+                      help='PositionSearchProblem (to the far corner) or CornersProblem')
+    parser.add_option('--frontiers', dest='frontiers', default='1000,10000,100000',
+                      help='standing frontier sizes for the queue-only timings')
+    parser.add_option('--seed', dest='seed', type='int', default=0,
+                      help='random seed for the maze generator')
+    parser.add_option('--loops', dest='loops', type='float', default=0.1,
+                      help='fraction of extra walls removed to create cycles')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    options.sizes = [int(s) for s in options.sizes.split(',')]
+    options.frontiers = [int(s) for s in options.frontiers.split(',')]
+    return options
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    benchmarkFifo(options.sizes, options.problem, options.seed, options.loops)
+    print
+    benchmarkQueues(options.frontiers)
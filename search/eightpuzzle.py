@@ -13,9 +13,17 @@
 
 
 import search
+import util
 import random
 import time
 import sys
+import os
+import mmap
+import math
+import json
+import itertools
+import collections
+import multiprocessing
 from optparse import OptionParser
 
 # Module Classes
@@ -30,9 +38,18 @@ class EightPuzzleState:
     This class defines the mechanics of the puzzle itself.  The
     task of recasting this puzzle as a search problem is left to
     the EightPuzzleSearchProblem class.
+
+    A state is a single int, 'packed', holding the tile of cell i (cells
+    numbered row by row) in bits 4i to 4i+3, together with the index of the
+    blank cell, 'blank'.  Moves, hashing and equality are int operations.
+    The 2-dimensional list 'cells' and 'blankLocation' are built on first
+    access, for display and for code that reads the board.
     """
 
-    def __init__( self, numbers ):
+    # Set by linearConflictValues; None until a heuristic asks for them
+    heuristicValues = None
+
+    def __init__( self, numbers = None ):
         """
           Constructs a new eight puzzle from an ordering of numbers.
 
@@ -51,18 +68,34 @@ class EightPuzzleState:
             | 6 | 7 | 8 |
             ------------
 
-        The configuration of the puzzle is stored in a 2-dimensional
-        list (a list of lists) 'cells'.
+        Without numbers the state is left empty, for result() to fill in.
         """
-        self.cells = []
-        numbers = numbers[:] # Make a copy so as not to cause side-effects.
-        numbers.reverse()
-        for row in range(size):
-            self.cells.append( [] )
-            for col in range(size):
-                self.cells[row].append( numbers.pop() )
-                if self.cells[row][col] == 0:
-                    self.blankLocation = row, col
+        if numbers is None:
+            return
+        bits = _tileBits()
+        packed = 0
+        for cell, tile in enumerate(numbers):
+            packed |= tile << (bits * cell)
+            if tile == 0:
+                self.blank = cell
+        self.packed = packed
+
+    def __getattr__( self, name ):
+        # The board views are computed from the packed form on first use
+        if name == 'cells':
+            tiles = self.getTiles()
+            self.cells = [tiles[row * size:(row + 1) * size] for row in range(size)]
+            return self.cells
+        if name == 'blankLocation':
+            return divmod(self.blank, size)
+        raise AttributeError(name)
+
+    def getTiles( self ):
+        "Returns the tiles as a flat list, cell by cell"
+        bits = _tileBits()
+        mask = (1 << bits) - 1
+        packed = self.packed
+        return [(packed >> (bits * cell)) & mask for cell in range(size * size)]
 
     def isGoal( self ):
         """
@@ -82,13 +115,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).isGoal()
         False
         """
-        current = 0
-        for row in range(size):
-            for col in range(size):
-                if current != self.cells[row][col]:
-                    return False
-                current += 1
-        return True
+        return self.packed == _moveTables()[1]
 
     def legalMoves( self ):
         """
@@ -100,17 +127,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([0, 1, 2, 3, 4, 5, 6, 7, 8]).legalMoves()
         ['down', 'right']
         """
-        moves = []
-        row, col = self.blankLocation
-        if(row != 0):
-            moves.append('up')
-        if(row != size - 1):
-            moves.append('down')
-        if(col != 0):
-            moves.append('left')
-        if(col != size - 1):
-            moves.append('right')
-        return moves
+        return [move for move, target, shift, targetShift in _moveTables()[0][self.blank]]
 
     def result(self, move):
         """
@@ -118,36 +135,22 @@ class EightPuzzleState:
         updated based on the provided move.
 
         The move should be a string drawn from a list returned by legalMoves.
-        Illegal moves will raise an exception, which may be an array bounds
-        exception.
+        Illegal moves raise an exception.
 
         NOTE: This function *does not* change the current object.  Instead,
         it returns a new object.
         """
-        row, col = self.blankLocation
-        if(move == 'up'):
-            newrow = row - 1
-            newcol = col
-        elif(move == 'down'):
-            newrow = row + 1
-            newcol = col
-        elif(move == 'left'):
-            newrow = row
-            newcol = col - 1
-        elif(move == 'right'):
-            newrow = row
-            newcol = col + 1
+        for legalMove, target, shift, targetShift in _moveTables()[0][self.blank]:
+            if legalMove == move:
+                break
         else:
-            raise "Illegal Move"
-
-        # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0 for _ in range(size * size)])
-        newPuzzle.cells = [values[:] for values in self.cells]
-        # And update it to reflect the move
-        newPuzzle.cells[row][col] = self.cells[newrow][newcol]
-        newPuzzle.cells[newrow][newcol] = self.cells[row][col]
-        newPuzzle.blankLocation = newrow, newcol
+            raise Exception("Illegal Move")
 
+        # The tile in the target cell slides into the blank cell
+        tile = (self.packed >> targetShift) & ((1 << _tileBits()) - 1)
+        newPuzzle = EightPuzzleState()
+        newPuzzle.packed = self.packed - (tile << targetShift) + (tile << shift)
+        newPuzzle.blank = target
         return newPuzzle
 
     # Utilities for comparison and display
@@ -160,13 +163,13 @@ class EightPuzzleState:
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range(size):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        return other is not None and self.packed == other.packed
+
+    def __ne__(self, other):
+        return not self == other
 
     def __hash__(self):
-        return hash(str(self.cells))
+        return hash(self.packed)
 
     def __getAsciiString(self):
         """
@@ -188,6 +191,36 @@ class EightPuzzleState:
     def __str__(self):
         return self.__getAsciiString()
 
+def _tileBits():
+    "The number of bits per tile in EightPuzzleState.packed: 4 up to the 15-puzzle"
+    return max(4, (size * size - 1).bit_length())
+
+_moveTablesBySize = {}
+
+def _moveTables():
+    """
+    Returns (moves, goal) for the current size.  moves[blank] lists a tuple
+    (move, target, shift, targetShift) for every legal move of the blank from
+    cell 'blank' to cell 'target', where shift and targetShift are the bit
+    offsets of the two cells; goal is the packed goal state.
+    """
+    tables = _moveTablesBySize.get(size)
+    if tables is None:
+        bits = _tileBits()
+        moves = []
+        for blank in range(size * size):
+            row, col = divmod(blank, size)
+            cellMoves = []
+            for move, newRow, newCol in (('up', row - 1, col), ('down', row + 1, col),
+                                         ('left', row, col - 1), ('right', row, col + 1)):
+                if 0 <= newRow < size and 0 <= newCol < size:
+                    target = newRow * size + newCol
+                    cellMoves.append((move, target, bits * blank, bits * target))
+            moves.append(cellMoves)
+        goal = sum([tile << (bits * tile) for tile in range(size * size)])
+        tables = _moveTablesBySize[size] = (moves, goal)
+    return tables
+
 class EightPuzzleSearchProblem(search.SearchProblem):
     """
       Implementation of a SearchProblem for the  Eight Puzzle domain
@@ -214,7 +247,9 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         self.expanded += 1
         succ = []
         for a in state.legalMoves():
-            succ.append((state.result(a), a, 1))
+            successor = state.result(a)
+            carryHeuristicValues(state, successor)
+            succ.append((successor, a, 1))
         return succ
 
     def getCostOfActions(self, actions):
@@ -348,6 +383,433 @@ def swapHeuristic(state, problem):
                 total_cost += 1
     return total_cost
 
+# Incremental Manhattan distance and linear conflicts
+
+_heuristicTablesBySize = {}
+
+def _heuristicTables():
+    """
+    Returns (distances, lines) for the current size.  distances[tile][cell] is
+    the Manhattan distance from cell to the goal cell of tile, 0 for the
+    blank; lines lists the cells of each row and then of each column.
+    """
+    tables = _heuristicTablesBySize.get(size)
+    if tables is None:
+        distances = [[0] * (size * size)]
+        for tile in range(1, size * size):
+            distances.append([manhattanDistance(divmod(tile, size), divmod(cell, size))
+                              for cell in range(size * size)])
+        lines = [range(row * size, (row + 1) * size) for row in range(size)]
+        lines += [range(col, size * size, size) for col in range(size)]
+        tables = _heuristicTablesBySize[size] = (distances, lines)
+    return tables
+
+_lineConflicts = {}
+
+def _lineConflict(line, tiles):
+    """
+    The linear conflict of one row or column holding tiles, in order: two
+    moves for every tile that has to leave the line so that the other tiles
+    whose goal is in it can pass each other.  That is the number of those
+    tiles outside their longest increasing run of goal positions.
+    """
+    key = (size, line, tiles)
+    conflict = _lineConflicts.get(key)
+    if conflict is None:
+        if line < size:
+            goals = [tile % size for tile in tiles if tile != 0 and tile // size == line]
+        else:
+            goals = [tile // size for tile in tiles if tile != 0 and tile % size == line - size]
+        longest = [1] * len(goals)
+        for i in range(len(goals)):
+            for j in range(i):
+                if goals[j] < goals[i]:
+                    longest[i] = max(longest[i], longest[j] + 1)
+        conflict = _lineConflicts[key] = 2 * (len(goals) - max(longest + [0]))
+    return conflict
+
+def _lineTiles(packed, cells):
+    bits = _tileBits()
+    mask = (1 << bits) - 1
+    return tuple([(packed >> (bits * cell)) & mask for cell in cells])
+
+def linearConflictValues(state):
+    """
+    Returns (h, manhattan, conflicts) for state: the Manhattan distance of the
+    tiles (not counting the blank), the linear conflict of each row and then
+    each column, and h, their sum.  The values are kept on the state as
+    'heuristicValues'; EightPuzzleSearchProblem.getSuccessors passes them on
+    to the successors with carryHeuristicValues, so they are only counted
+    from scratch for the start state.
+    """
+    values = state.heuristicValues
+    if values is None:
+        distances, lines = _heuristicTables()
+        tiles = state.getTiles()
+        manhattan = sum([distances[tile][cell] for cell, tile in enumerate(tiles)])
+        conflicts = tuple([_lineConflict(line, tuple([tiles[cell] for cell in cells]))
+                           for line, cells in enumerate(lines)])
+        values = state.heuristicValues = (manhattan + sum(conflicts), manhattan, conflicts)
+    return values
+
+def carryHeuristicValues(parent, child):
+    """
+    Gives child, one move away from parent, the heuristic values of parent
+    updated for the tile that moved, if parent has any.  The Manhattan
+    distance changes by that tile's contribution alone.  The tile stays in the
+    order of the line it moves along, so only the two lines it leaves and
+    enters are recounted.
+    """
+    values = parent.heuristicValues
+    if values is None:
+        return
+    h, manhattan, conflicts = values
+    distances, lines = _heuristicTables()
+    source, target = child.blank, parent.blank
+    bits = _tileBits()
+    tile = (child.packed >> (bits * target)) & ((1 << bits) - 1)
+    moved = distances[tile][target] - distances[tile][source]
+    change = moved
+    if source // size == target // size:
+        changed = (size + source % size, size + target % size)
+    else:
+        changed = (source // size, target // size)
+    conflicts = list(conflicts)
+    for line in changed:
+        conflict = _lineConflict(line, _lineTiles(child.packed, lines[line]))
+        change += conflict - conflicts[line]
+        conflicts[line] = conflict
+    child.heuristicValues = (h + change, manhattan + moved, tuple(conflicts))
+
+def incrementalManhattanHeuristic(state, problem = None):
+    "The Manhattan distance of the tiles, without the blank, kept up to date move by move"
+    return linearConflictValues(state)[1]
+
+def linearConflictHeuristic(state, problem = None):
+    "The Manhattan distance plus the linear conflicts of every row and column"
+    return linearConflictValues(state)[0]
+
+# Pattern databases
+
+# Where pattern databases are written the first time they are needed
+PUZZLE_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzledata')
+
+def loadTable(path, computeTable):
+    """
+    Returns a read-only memory map of the byte table stored at path, first
+    writing the bytearray returned by computeTable() there if the file does
+    not exist yet.  The file is written under a temporary name and renamed,
+    so concurrent processes never map a half-written table.
+    """
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        temporary = '%s.%d.tmp' % (path, os.getpid())
+        f = open(temporary, 'wb')
+        f.write(computeTable())
+        f.close()
+        os.rename(temporary, path)
+    f = open(path, 'rb')
+    table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    f.close()
+    return table
+
+class PatternDatabase:
+    """
+    The exact number of moves of one group of tiles ('pattern') needed to
+    bring that group home, in the puzzle where every other tile is unlabeled
+    and the blank slides over unlabeled tiles for free.  A real move moves
+    exactly one tile, so the costs of disjoint groups add up to an admissible
+    heuristic.
+
+    The table holds one byte per placement of the group, indexed by the
+    cells of its tiles with 'bits' bits apiece (the cell of pattern[i] in
+    bits i * bits and up).  It is computed once by a backwards breadth first
+    search from the goal, written to a file and memory-mapped from there.
+    """
+    def __init__(self, width, pattern, directory=PUZZLE_DATA_DIR):
+        self.width = width
+        self.pattern = tuple(pattern)
+        self.bits = max(1, (width * width - 1).bit_length())
+        self.shifts = [self.bits * i for i in range(len(self.pattern))]
+        name = 'pdb-%dx%d-%s.bin' % (width, width, '-'.join([str(tile) for tile in self.pattern]))
+        self.table = loadTable(os.path.join(directory, name), self.computeTable)
+
+    def computeTable(self):
+        """
+        Returns the table as a bytearray; 255 marks indices that are not
+        placements.
+
+        The search runs over placements plus the blank's cell (in the bits
+        above the placement), one layer per group move.  Each layer is first
+        closed under the free blank moves, and a placement's cost is the
+        layer in which it is first seen with any blank cell.
+        """
+        width, bits, shifts = self.width, self.bits, self.shifts
+        mask = (1 << bits) - 1
+        blankShift = bits * len(self.pattern)
+        placementMask = (1 << blankShift) - 1
+        neighbors = []
+        for cell in range(width * width):
+            row, col = divmod(cell, width)
+            neighbors.append([r * width + c for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                              if 0 <= r < width and 0 <= c < width])
+        table = bytearray([255]) * (1 << blankShift)
+        closed = bytearray(1 << (blankShift + bits))
+        goal = sum([tile << shift for tile, shift in zip(self.pattern, shifts)]) # tile t belongs in cell t, the blank in 0
+        layer, depth = [goal], 0
+        while layer:
+            nextLayer = []
+            stack = layer
+            while stack:
+                index = stack.pop()
+                if closed[index]: continue
+                closed[index] = 1
+                placement = index & placementMask
+                if table[placement] == 255:
+                    table[placement] = depth
+                blank = index >> blankShift
+                cells = [(index >> shift) & mask for shift in shifts]
+                for nextCell in neighbors[blank]:
+                    if nextCell in cells:
+                        # The group tile in nextCell slides into the blank: one move
+                        shift = shifts[cells.index(nextCell)]
+                        child = (placement + ((blank - nextCell) << shift)) | (nextCell << blankShift)
+                        if not closed[child]: nextLayer.append(child)
+                    else:
+                        child = placement | (nextCell << blankShift)
+                        if not closed[child]: stack.append(child)
+            layer = nextLayer
+            depth += 1
+        return table
+
+    def getCost(self, cellOf):
+        "cellOf[tile] is the cell (row * width + col) the tile is in"
+        index = 0
+        for tile, shift in zip(self.pattern, self.shifts):
+            index |= cellOf[tile] << shift
+        return ord(self.table[index])
+
+def patternGroups(width, groupSize=5):
+    """
+    Splits the tiles 1 .. width*width-1 into consecutive groups of nearly equal
+    size, none larger than groupSize: two groups of four for the eight puzzle,
+    three groups of five for the fifteen puzzle.
+    """
+    tiles = range(1, width * width)
+    count = -(-len(tiles) // groupSize)
+    return [tiles[i * len(tiles) // count:(i + 1) * len(tiles) // count] for i in range(count)]
+
+_patternDatabases = {}
+
+def getPatternDatabases(width):
+    "Returns the disjoint pattern databases for a width x width puzzle, loading them on first use"
+    if width not in _patternDatabases:
+        _patternDatabases[width] = [PatternDatabase(width, group) for group in patternGroups(width)]
+    return _patternDatabases[width]
+
+def patternDatabaseHeuristic(state, problem = None):
+    """
+    The sum of the disjoint additive pattern database costs of the state.
+    Unlike the heuristics above, the blank is not counted, so it is
+    admissible.  It is not always consistent (a group's cost is a minimum over
+    blank cells), which A* copes with by reopening states.
+    """
+    cellOf = [0] * (size * size)
+    for cell, tile in enumerate(state.getTiles()):
+        cellOf[tile] = cell
+    total = 0
+    for database in getPatternDatabases(size):
+        total += database.getCost(cellOf)
+    return total
+
+# Permutation ranking
+
+def rankPermutation(tiles):
+    """
+    Returns the lexicographic rank, from 0 to n!-1, of a permutation of
+    0 .. n-1 through its Lehmer code: digit i counts the entries after
+    tiles[i] that are smaller than it, and weighs (n-1-i)!.
+
+    >>> rankPermutation([0, 1, 2]), rankPermutation([2, 1, 0])
+    (0, 5)
+    """
+    n = len(tiles)
+    rank = 0
+    for i in range(n):
+        tile = tiles[i]
+        smaller = 0
+        for later in tiles[i + 1:]:
+            if later < tile:
+                smaller += 1
+        rank = rank * (n - i) + smaller
+    return rank
+
+def unrankPermutation(rank, n):
+    """
+    Returns the permutation of 0 .. n-1 with the given lexicographic rank.
+
+    >>> unrankPermutation(rankPermutation([3, 0, 2, 1]), 4)
+    [3, 0, 2, 1]
+    """
+    digits = []
+    for base in range(1, n + 1):
+        rank, digit = divmod(rank, base)
+        digits.append(digit)
+    digits.reverse()
+    remaining = range(n)
+    return [remaining.pop(digit) for digit in digits]
+
+# Tables with an entry for every permutation of the board, indexed by rank,
+# are only built while there are at most this many permutations: up to 3x3
+MAX_RANKED_STATES = 1 << 32
+
+def rankedTablesFit():
+    "Returns whether tables indexed by permutation rank fit for the current size"
+    return math.factorial(size * size) <= MAX_RANKED_STATES
+
+PUZZLE_MOVES = ['up', 'down', 'left', 'right']
+REVERSE_MOVES = {'up': 'down', 'down': 'up', 'left': 'right', 'right': 'left'}
+
+def rankedAStarSearch(problem, heuristic=nullHeuristic):
+    """
+    A* on an EightPuzzleSearchProblem with its bookkeeping in flat arrays
+    indexed by the rank of each state's permutation instead of dicts of
+    states: a bitset of expanded states, a byte of path cost per state and a
+    byte with the move that reached it, from which the path is rebuilt by
+    undoing moves from the goal.  For the 3x3 puzzle that is about 770 kB for
+    all 9! permutations, however much of the space the search covers.  The
+    frontier holds bare ranks, which are unranked into states when popped.
+
+    Moves must cost 1 and paths must be shorter than 255 moves.  States are
+    reopened when a cheaper path turns up, so inconsistent heuristics still
+    give optimal paths.
+    """
+    states = math.factorial(size * size)
+    if not rankedTablesFit():
+        raise Exception('rankedAStarSearch needs n! bytes; %dx%d puzzles are too large' % (size, size))
+    closed = bytearray(states // 8 + 1)
+    gScore = bytearray([255]) * states
+    moveInto = bytearray(states)
+
+    start = problem.getStartState()
+    startRank = rankPermutation(start.getTiles())
+    gScore[startRank] = 0
+    frontier = util.BucketQueue()
+    frontier.push(startRank, heuristic(start, problem))
+    while not frontier.isEmpty():
+        rank = frontier.pop()
+        if closed[rank >> 3] & (1 << (rank & 7)):
+            continue
+        state = EightPuzzleState(unrankPermutation(rank, size * size))
+        g = gScore[rank]
+        if problem.isGoalState(state):
+            return _rankedPath(state, rank, startRank, moveInto)
+        closed[rank >> 3] |= 1 << (rank & 7)
+        for successor, action, stepCost in problem.getSuccessors(state):
+            successorRank = rankPermutation(successor.getTiles())
+            if g + 1 < gScore[successorRank]:
+                gScore[successorRank] = g + 1
+                moveInto[successorRank] = PUZZLE_MOVES.index(action)
+                closed[successorRank >> 3] &= ~(1 << (successorRank & 7))
+                frontier.push(successorRank, g + 1 + heuristic(successor, problem))
+    return []
+
+def _rankedPath(state, rank, startRank, moveInto):
+    "Rebuilds the moves from the start to state by undoing the recorded moves"
+    actions = []
+    while rank != startRank:
+        move = PUZZLE_MOVES[moveInto[rank]]
+        actions.append(move)
+        state = state.result(REVERSE_MOVES[move])
+        rank = rankPermutation(state.getTiles())
+    actions.reverse()
+    return actions
+
+# Complete distance table
+
+class DistanceTable:
+    """
+    The exact number of moves from every state of the puzzle to the goal,
+    one byte per permutation indexed by rankPermutation (255 for the
+    unsolvable half).  It is computed once by a breadth first search backwards
+    from the goal over all reachable states, written to a file and
+    memory-mapped from there: 9! bytes for the 3x3 puzzle.  With it, any
+    puzzle is solved optimally by always moving to a neighbor one move
+    closer to the goal, without any search.
+    """
+    def __init__(self, directory=PUZZLE_DATA_DIR):
+        self.size = size
+        if not rankedTablesFit():
+            raise Exception('The distance table of a %dx%d puzzle does not fit in memory' % (size, size))
+        name = 'distances-%dx%d.bin' % (size, size)
+        self.table = loadTable(os.path.join(directory, name), self.computeTable)
+
+    def computeTable(self):
+        table = bytearray([255]) * math.factorial(size * size)
+        goal = EightPuzzleState(range(size * size))
+        table[rankPermutation(goal.getTiles())] = 0
+        layer, depth = [goal], 0
+        while layer:
+            depth += 1
+            nextLayer = []
+            for state in layer:
+                for move in state.legalMoves():
+                    child = state.result(move)
+                    rank = rankPermutation(child.getTiles())
+                    if table[rank] == 255:
+                        table[rank] = depth
+                        nextLayer.append(child)
+            layer = nextLayer
+        return table
+
+    def getDistance(self, state):
+        "Returns the number of moves from state to the goal, or None if it cannot be solved"
+        distance = ord(self.table[rankPermutation(state.getTiles())])
+        if distance == 255:
+            return None
+        return distance
+
+    def solve(self, puzzle):
+        "Returns a shortest list of moves solving puzzle, or None if it cannot be solved"
+        distance = self.getDistance(puzzle)
+        if distance is None:
+            return None
+        moves = []
+        while distance > 0:
+            for move in puzzle.legalMoves():
+                child = puzzle.result(move)
+                if self.getDistance(child) == distance - 1:
+                    break
+            moves.append(move)
+            puzzle, distance = child, distance - 1
+        return moves
+
+_distanceTables = {}
+
+def getDistanceTable():
+    "Returns the DistanceTable for the current size, loading it on first use"
+    if size not in _distanceTables:
+        _distanceTables[size] = DistanceTable()
+    return _distanceTables[size]
+
+def distanceTableSearch(problem, heuristic=None):
+    """
+    Solves an EightPuzzleSearchProblem by descending the distance table from
+    the start state.  The heuristic is ignored; problem.expanded counts the
+    states moved through.
+    """
+    moves = getDistanceTable().solve(problem.getStartState())
+    if moves is None:
+        return []
+    problem.expanded += len(moves)
+    return moves
+
+def distanceTableHeuristic(state, problem = None):
+    "The exact distance to the goal, read from the distance table (perfect, and 255 if unsolvable)"
+    return ord(getDistanceTable().table[rankPermutation(state.getTiles())])
+
 def StalinSort():
     puzzle = createRandomEightPuzzle(100)
     print('A random puzzle:')
@@ -366,11 +828,68 @@ def StalinSort():
     print("\nStalin's hand falls upon this puzzle and it now becomes:")
     print(puzzle)
 
+HEURISTICS = {
+    'manhattan': manhattanDistanceToCorrectPositionHeuristic,
+    'euclidian': euclideanDistanceToCorrectPositionHeuristic,
+    'tileMisplaced': tileMisplacedHeuristic,
+    'outOfColumnRow': outOfColumnRowHeuristic,
+    'swap': swapHeuristic,
+    'patterndb': patternDatabaseHeuristic,
+    'table': distanceTableHeuristic,
+    'incrementalManhattan': incrementalManhattanHeuristic,
+    'linearConflict': linearConflictHeuristic,
+    'null': nullHeuristic,
+}
+
+def getSearchFunction(name, tableSize=100000):
+    "Returns the search function called name on the command line, or None"
+    if name == "wastar":
+        return search.weightedAStarSearch
+    elif name == "astar":
+        return search.aStarSearch
+    elif name == "ranked":
+        return rankedAStarSearch
+    elif name == "table":
+        return distanceTableSearch
+    elif name == "idastar":
+        return lambda problem, heuristic: search.idaStarSearch(problem, heuristic, tableSize)
+    return None
+
+# The search functions and heuristics that need rankedTablesFit()
+RANKED_FUNCTIONS = ('ranked', 'table')
+RANKED_HEURISTICS = ('table',)
+
+def unsupportedOptions(functionName, heuristicName):
+    "Returns why the function and heuristic cannot solve puzzles of the current size, or None"
+    if rankedTablesFit():
+        return None
+    for kind, name, names in (('function', functionName, RANKED_FUNCTIONS),
+                              ('heuristic', heuristicName, RANKED_HEURISTICS)):
+        if name in names:
+            return ('The %s %s needs a table of %d! entries, too many for a %dx%d puzzle'
+                    % (kind, name, size * size, size, size))
+    return None
+
 def readCommand(args):
     parser = OptionParser()
     parser.add_option("--heuristic", dest='heuristic', action="store", type="string", default="null")
     parser.add_option("-s", "--size", dest="size", action="store", type="int", default=3)
     parser.add_option("-f", "--function", dest="function", action="store", type="string", default="astar")
+    parser.add_option("-t", "--tableSize", dest="tableSize", action="store", type="int", default=100000,
+                      help="transposition table size for idastar (0 disables it)")
+    parser.add_option("-b", "--batch", dest="batch", action="store", type="string", default=None,
+                      help="solve the puzzles in this file ('-' for stdin, 'random' for --count random ones) "
+                           "without interaction, printing one JSON line per puzzle")
+    parser.add_option("-n", "--count", dest="count", action="store", type="int", default=100,
+                      help="number of random puzzles for --batch random")
+    parser.add_option("--seed", dest="seed", action="store", type="int", default=None,
+                      help="random seed for --batch random")
+    parser.add_option("--scramble", dest="scramble", action="store", type="int", default=100,
+                      help="random moves applied to each puzzle for --batch random")
+    parser.add_option("-w", "--workers", dest="workers", action="store", type="int", default=None,
+                      help="worker processes for --batch (default: one per core)")
+    parser.add_option("--maxTasks", dest="maxTasks", action="store", type="int", default=100,
+                      help="puzzles a --batch worker solves before it is replaced, bounding its memory")
     
     options, arg = parser.parse_args(args)
 
@@ -378,41 +897,145 @@ def readCommand(args):
         print("Commands not understood")
         return
 
-    heuristic = None
-
-    if options.heuristic == "manhattan":
-        heuristic = manhattanDistanceToCorrectPositionHeuristic
-    elif options.heuristic == "euclidian": 
-        heuristic = euclideanDistanceToCorrectPositionHeuristic
-    elif options.heuristic == "tileMisplaced":
-        heuristic = tileMisplacedHeuristic
-    elif options.heuristic == "outOfColumnRow":
-        heuristic = outOfColumnRowHeuristic
-    elif options.heuristic == "swap":
-        heuristic = swapHeuristic
-    elif options.heuristic == "null":
-        heuristic = nullHeuristic
-    else:
+    if options.heuristic not in HEURISTICS:
         print("No such heuristic found")
         return
+    heuristic = HEURISTICS[options.heuristic]
 
-    func = None
     if options.function == "StalinSort":
         StalinSort()
         return
-    elif options.function == "wastar":
-        func = search.weightedAStarSearch
-    elif options.function == "astar":
-        func = search.aStarSearch
-    else:
+    func = getSearchFunction(options.function, options.tableSize)
+    if func is None:
         print("That function doesn't exist")
         return
 
     global size 
     size = options.size
 
+    reason = unsupportedOptions(options.function, options.heuristic)
+    if reason is not None:
+        print(reason)
+        return
+
+    if options.batch is not None:
+        batch = (options.function, options.heuristic, options.tableSize,
+                 options.workers, options.maxTasks)
+        if options.batch == 'random':
+            random.seed(options.seed)
+            runBatch((createRandomEightPuzzle(options.scramble).getTiles()
+                      for i in xrange(options.count)), *batch)
+        elif options.batch == '-':
+            runBatch(readPuzzles(sys.stdin), *batch)
+        else:
+            with open(options.batch) as lines:
+                runBatch(readPuzzles(lines), *batch)
+        return
+
     runGame(func, heuristic)
 
+# Batch solving
+
+def isSolvable(tiles):
+    """
+    Returns whether the goal can be reached from the puzzle with these tiles
+    (0 is the blank): the parity of the tile inversions, plus the row of the
+    blank counted from the top on even widths, must match the goal's.
+    """
+    width = int(math.sqrt(len(tiles)))
+    numbers = [tile for tile in tiles if tile != 0]
+    inversions = sum(1 for i in range(len(numbers)) for j in range(i + 1, len(numbers))
+                     if numbers[i] > numbers[j])
+    if width % 2 == 1:
+        return inversions % 2 == 0
+    blankRow = tiles.index(0) // width
+    return (inversions + blankRow) % 2 == 0
+
+def readPuzzles(lines):
+    "Yields the lines that hold puzzles, stripped, skipping blank lines and lines starting with '#'"
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+def parsePuzzle(line):
+    """
+    Returns the tiles of a puzzle written as a line of numbers, row by row,
+    separated by spaces or commas, 0 for the blank.  Raises ValueError if
+    the line is not a puzzle of the current size.
+    """
+    try:
+        tiles = [int(tile) for tile in line.replace(',', ' ').split()]
+    except ValueError:
+        tiles = None
+    if tiles is None or sorted(tiles) != range(size * size):
+        raise ValueError('Not a %dx%d puzzle: %s' % (size, size, line))
+    return tiles
+
+def _initBatchWorker(puzzleSize, functionName, heuristicName, tableSize):
+    "Sets up the search function and heuristic of a batch worker process"
+    global size, _batchFunction, _batchHeuristic
+    size = puzzleSize
+    _batchFunction = getSearchFunction(functionName, tableSize)
+    _batchHeuristic = HEURISTICS[heuristicName]
+
+def _solveBatchPuzzle(job):
+    """
+    Solves one (index, puzzle) job in a batch worker and returns its result
+    record.  Unsolvable puzzles get no moves; a puzzle that cannot be read
+    or whose search fails gets no moves and an 'error' message instead of
+    stopping the batch.
+    """
+    index, puzzle = job
+    record = {'index': index, 'puzzle': puzzle, 'moves': None, 'length': None,
+              'expanded': 0, 'time': 0.0, 'error': None}
+    try:
+        if isinstance(puzzle, str):
+            puzzle = record['puzzle'] = parsePuzzle(puzzle)
+        if isSolvable(puzzle):
+            problem = EightPuzzleSearchProblem(EightPuzzleState(puzzle))
+            start = time.time()
+            path = _batchFunction(problem=problem, heuristic=_batchHeuristic)
+            record.update(moves=path, length=len(path), expanded=problem.expanded,
+                          time=round(time.time() - start, 6))
+    except Exception, e:
+        record['error'] = '%s: %s' % (type(e).__name__, e)
+    return record
+
+def runBatch(puzzles, functionName, heuristicName, tableSize=100000,
+             workers=None, maxTasks=100, out=sys.stdout):
+    """
+    Solves the puzzles, tile lists or lines for parsePuzzle, on a pool of
+    worker processes and writes one JSON line per puzzle to out, in input
+    order, as soon as it is solved.
+
+    At most a few puzzles per worker are in flight at once, so neither an
+    endless input nor a backlog of results piles up in memory, and each
+    worker is replaced after maxTasks puzzles to release whatever its search
+    kept.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(workers, _initBatchWorker,
+                                (size, functionName, heuristicName, tableSize), maxTasks)
+    jobs = enumerate(puzzles)
+    pending = collections.deque()
+    solved = 0
+    start = time.time()
+    try:
+        while True:
+            for job in itertools.islice(jobs, workers * 8 - len(pending)):
+                pending.append(pool.apply_async(_solveBatchPuzzle, (job,)))
+            if not pending:
+                break
+            record = pending.popleft().get()
+            out.write(json.dumps(record, sort_keys=True) + '\n')
+            out.flush()
+            solved += 1
+    finally:
+        pool.terminate()
+        pool.join()
+    sys.stderr.write('Solved %d puzzles in %.2f seconds on %d workers\n' % (solved, time.time() - start, workers))
+
 def runGame(func, heuristic):
     puzzle = createRandomEightPuzzle(30)
     #puzzle = EightPuzzleState([7, 2, 4, 5, 0, 6, 8, 3, 1])
@@ -21,7 +21,8 @@
 # For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
 
 from util import *
-import time, os
+import time, os, random, string, binascii
+import itertools, operator
 import traceback
 import sys
 
@@ -163,13 +164,85 @@ class AgentState:
     def getDirection(self):
         return self.configuration.getDirection()
 
+_ZOBRIST_KEYS = []
+_ZOBRIST_RANDOM = random.Random(188)
+
+def _zobristKeys(cells):
+    """
+    Returns the shared list of random 63-bit Zobrist keys, one per cell index
+    (x * height + y), grown to at least 'cells' entries.
+    """
+    while len(_ZOBRIST_KEYS) < cells:
+        _ZOBRIST_KEYS.append(int(_ZOBRIST_RANDOM.getrandbits(63)))
+    return _ZOBRIST_KEYS
+
+_BOOLS = (False, True)
+
+class GridColumn(object):
+    """
+    A view of one column (fixed x) of a Grid, so that grid[x][y] reads and
+    writes the grid's flat storage.  Writes XOR the cell's Zobrist key into
+    the hash shared with the grid whenever the cell flips.
+    """
+    __slots__ = ('data', 'hashBox', 'offset', 'height')
+
+    def __init__(self, data, hashBox, offset, height):
+        self.data = data
+        self.hashBox = hashBox
+        self.offset = offset
+        self.height = height
+
+    def __getitem__(self, y):
+        if 0 <= y < self.height:
+            return _BOOLS[self.data[self.offset + y]]
+        if -self.height <= y < 0:
+            return _BOOLS[self.data[self.offset + self.height + y]]
+        raise IndexError('grid column index out of range')
+
+    def __setitem__(self, y, value):
+        if y < 0: y += self.height
+        if not 0 <= y < self.height: raise IndexError('grid column index out of range')
+        i = self.offset + y
+        value = 1 if value else 0
+        if self.data[i] != value:
+            self.data[i] = value
+            if self.hashBox[0] is not None:
+                self.hashBox[0] ^= _ZOBRIST_KEYS[i]
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        for b in self.data[self.offset:self.offset + self.height]:
+            yield _BOOLS[b]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def count(self, item=True):
+        trues = self.data.count('\x01', self.offset, self.offset + self.height)
+        if item: return trues
+        return self.height - trues
+
 class Grid:
     """
-    A 2-dimensional array of objects backed by a list of lists.  Data is accessed
-    via grid[x][y] where (x,y) are positions on a Pacman map with x horizontal,
-    y vertical and the origin (0,0) in the bottom left corner.
+    A 2-dimensional array of booleans.  Data is accessed via grid[x][y] where
+    (x,y) are positions on a Pacman map with x horizontal, y vertical and the
+    origin (0,0) in the bottom left corner.
 
     The __str__ method constructs an output that is oriented like a pacman board.
+
+    Cells are stored one byte each in a flat bytearray, column by column
+    (cell x * height + y); grid[x] is a GridColumn view onto it.  Copies are a
+    single buffer copy and count() is a byte count.
+
+    The hash is a Zobrist hash (the XOR of a random key per true cell) kept up
+    to date on every cell write, so hashing a grid is O(1).  Grids sharing
+    their data through shallowCopy share the hash as well.  Bulk loads drop
+    the hash, and the next __hash__ rebuilds it.
     """
     def __init__(self, width, height, initialValue=False, bitRepresentation=None):
         if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
@@ -177,57 +250,92 @@ class Grid:
 
         self.width = width
         self.height = height
-        self.data = [[initialValue for y in range(height)] for x in range(width)]
+        keys = _zobristKeys(width * height)
+        h = 0
+        if initialValue:
+            for i in range(width * height):
+                h ^= keys[i]
+        self._hash = [h]
+        self.data = bytearray([1 if initialValue else 0]) * (width * height)
+        self._makeColumns()
         if bitRepresentation:
             self._unpackBits(bitRepresentation)
 
+    def _makeColumns(self):
+        self._columns = [GridColumn(self.data, self._hash, x * self.height, self.height)
+                         for x in range(self.width)]
+
     def __getitem__(self, i):
-        return self.data[i]
+        return self._columns[i]
+
+    def get(self, x, y):
+        """
+        Returns the cell at (x, y) straight from the flat storage, for hot
+        loops.  Unlike grid[x][y] there is no bounds check: (x, y) must be on
+        the grid.
+        """
+        return _BOOLS[self.data[x * self.height + y]]
 
     def __setitem__(self, key, item):
-        self.data[key] = item
+        column = self._columns[key]
+        for y in range(self.height):
+            column[y] = item[y]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_columns']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._makeColumns()
 
     def __str__(self):
-        out = [[str(self.data[x][y])[0] for x in range(self.width)] for y in range(self.height)]
+        out = [[str(self[x][y])[0] for x in range(self.width)] for y in range(self.height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
 
     def __eq__(self, other):
         if other == None: return False
-        return self.data == other.data
+        return self.height == other.height and self.data == other.data
 
     def __hash__(self):
-        # return hash(str(self))
-        base = 1
-        h = 0
-        for l in self.data:
-            for i in l:
-                if i:
-                    h += base
-                base *= 2
-        return hash(h)
+        if self._hash[0] is None:
+            trueCells = itertools.compress(xrange(len(self.data)), self.data)
+            self._hash[0] = reduce(operator.xor, itertools.imap(_ZOBRIST_KEYS.__getitem__, trueCells), 0)
+        return self._hash[0]
 
     def copy(self):
-        g = Grid(self.width, self.height)
-        g.data = [x[:] for x in self.data]
+        g = Grid(0, 0)
+        g.width, g.height = self.width, self.height
+        g._hash = [self._hash[0]]
+        g.data = bytearray(self.data)
+        g._makeColumns()
         return g
 
     def deepCopy(self):
         return self.copy()
 
     def shallowCopy(self):
-        g = Grid(self.width, self.height)
+        g = Grid(0, 0)
+        g.width, g.height = self.width, self.height
+        g._hash = self._hash
         g.data = self.data
+        g._columns = self._columns
         return g
 
     def count(self, item =True ):
-        return sum([x.count(item) for x in self.data])
+        trues = self.data.count('\x01')
+        if item: return trues
+        return len(self.data) - trues
 
     def asList(self, key = True):
         list = []
-        for x in range(self.width):
-            for y in range(self.height):
-                if self[x][y] == key: list.append( (x,y) )
+        byte = '\x01' if key else '\x00'
+        i = self.data.find(byte)
+        while i != -1:
+            list.append(divmod(i, self.height))
+            i = self.data.find(byte, i + 1)
         return list
 
     def packBits(self):
@@ -235,20 +343,29 @@ class Grid:
         Returns an efficient int list representation
 
         (width, height, bitPackedInts...)
+
+        Each 30-cell int is still converted on its own; packBytes, which
+        converts the whole grid at once, is the faster format.
         """
+        cells = self._bitString()
+        n = self.CELLS_PER_INT
         bits = [self.width, self.height]
-        currentInt = 0
-        for i in range(self.height * self.width):
-            bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
-            x, y = self._cellIndexToPosition(i)
-            if self[x][y]:
-                currentInt += 2 ** bit
-            if (i + 1) % self.CELLS_PER_INT == 0:
-                bits.append(currentInt)
-                currentInt = 0
-        bits.append(currentInt)
+        bits.extend([int(cells[i:i + n].ljust(n, '0'), 2) for i in range(0, len(cells), n)])
+        if len(cells) % n == 0:
+            bits.append(0)
         return tuple(bits)
 
+    def packBytes(self):
+        """
+        Returns the cells as a string of bits, eight cells to a byte in cell
+        index order (x * height + y) with the first cell in the high bit.  The
+        last byte is padded with zero bits; see unpackBytes.
+        """
+        cells = self._bitString()
+        if not cells: return ''
+        cells += '0' * (-len(cells) % 8)
+        return binascii.unhexlify('%0*x' % (len(cells) / 4, long(cells, 2)))
+
     def _cellIndexToPosition(self, index):
         x = index / self.height
         y = index % self.height
@@ -258,25 +375,27 @@ class Grid:
         """
         Fills in data from a bit-level representation
         """
-        cell = 0
         for packed in bits:
-            for bit in self._unpackInt(packed, self.CELLS_PER_INT):
-                if cell == self.width * self.height: break
-                x, y = self._cellIndexToPosition(cell)
-                self[x][y] = bit
-                cell += 1
-
-    def _unpackInt(self, packed, size):
-        bools = []
-        if packed < 0: raise ValueError, "must be a positive integer"
-        for i in range(size):
-            n = 2 ** (self.CELLS_PER_INT - i - 1)
-            if packed >= n:
-                bools.append(True)
-                packed -= n
-            else:
-                bools.append(False)
-        return bools
+            if packed < 0: raise ValueError, "must be a positive integer"
+        n = self.CELLS_PER_INT
+        self._setBitString(''.join([bin(packed)[2:].zfill(n) for packed in bits]))
+
+    def _bitString(self):
+        "Returns the cells as a string of '0' and '1' characters in cell index order"
+        return str(self.data).translate(_CELLS_TO_BITS)
+
+    def _setBitString(self, cells):
+        """
+        Overwrites the cells from a string of '0' and '1' characters in cell
+        index order; missing cells are cleared and extra characters ignored.
+        """
+        size = self.width * self.height
+        cells = cells[:size].ljust(size, '0')
+        self.data[:] = cells.translate(_BITS_TO_CELLS)
+        self._hash[0] = None
+
+_CELLS_TO_BITS = string.maketrans('\x00\x01', '01')
+_BITS_TO_CELLS = string.maketrans('01', '\x00\x01')
 
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1,2)):
@@ -284,6 +403,14 @@ def reconstituteGrid(bitRep):
     width, height = bitRep[:2]
     return Grid(width, height, bitRepresentation= bitRep[2:])
 
+def unpackBytes(width, height, packed):
+    "Returns the width x height Grid whose cells were packed by Grid.packBytes"
+    grid = Grid(width, height)
+    if packed:
+        bits = bin(long(binascii.hexlify(packed), 16))[2:]
+        grid._setBitString(bits.zfill(len(packed) * 8))
+    return grid
+
 ####################################
 # Parts you shouldn't have to read #
 ####################################
@@ -350,7 +477,7 @@ class Actions:
             dx, dy = vec
             next_y = y_int + dy
             next_x = x_int + dx
-            if not walls[next_x][next_y]: possible.append(dir)
+            if not walls.get(next_x, next_y): possible.append(dir)
 
         return possible
 
@@ -366,7 +493,7 @@ class Actions:
             if next_x < 0 or next_x == walls.width: continue
             next_y = y_int + dy
             if next_y < 0 or next_y == walls.height: continue
-            if not walls[next_x][next_y]: neighbors.append((next_x, next_y))
+            if not walls.get(next_x, next_y): neighbors.append((next_x, next_y))
         return neighbors
     getLegalNeighbors = staticmethod(getLegalNeighbors)
 
@@ -378,7 +505,14 @@ class Actions:
 
 class GameStateData:
     """
-
+    foodPositions is the frozenset of (x,y) cells that still hold food.  It
+    is shared between successors and replaced, along with the food grid, only
+    when a dot is eaten.
+
+    The hash of a GameStateData is computed once and cached.  Any attribute
+    assignment on the data drops the cached value; in-place changes to agent
+    states, food or capsules must be followed by such an assignment (as
+    GameState.generateSuccessor does with the score) before the state is hashed.
     """
     def __init__( self, prevState = None ):
         """
@@ -386,6 +520,7 @@ class GameStateData:
         """
         if prevState != None:
             self.food = prevState.food.shallowCopy()
+            self.foodPositions = prevState.foodPositions
             self.capsules = prevState.capsules[:]
             self.agentStates = self.copyAgentStates( prevState.agentStates )
             self.layout = prevState.layout
@@ -400,6 +535,10 @@ class GameStateData:
         self._win = False
         self.scoreChange = 0
 
+    def __setattr__( self, name, value ):
+        self.__dict__[name] = value
+        self.__dict__['_hash'] = None
+
     def deepCopy( self ):
         state = GameStateData( self )
         state.food = self.food.deepCopy()
@@ -432,17 +571,21 @@ class GameStateData:
         """
         Allows states to be keys of dictionaries.
         """
-        for i, state in enumerate( self.agentStates ):
-            try:
-                int(hash(state))
-            except TypeError, e:
-                print e
-                #hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113* hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575 )
+        h = self.__dict__.get('_hash')
+        if h is None:
+            for i, state in enumerate( self.agentStates ):
+                try:
+                    int(hash(state))
+                except TypeError, e:
+                    print e
+                    #hash(state)
+            h = int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113* hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575 )
+            self.__dict__['_hash'] = h
+        return h
 
     def __str__( self ):
         width, height = self.layout.width, self.layout.height
-        map = Grid(width, height)
+        map = [[' '] * height for x in range(width)]
         if type(self.food) == type((1,2)):
             self.food = reconstituteGrid(self.food)
         for x in range(width):
@@ -463,7 +606,9 @@ class GameStateData:
         for x, y in self.capsules:
             map[x][y] = 'o'
 
-        return str(map) + ("\nScore: %d\n" % self.score)
+        rows = [''.join([map[x][y] for x in range(width)]) for y in range(height)]
+        rows.reverse()
+        return '\n'.join(rows) + ("\nScore: %d\n" % self.score)
 
     def _foodWallStr( self, hasFood, hasWall ):
         if hasFood:
@@ -497,6 +642,7 @@ class GameStateData:
         Creates an initial game state from a layout array (see layout.py).
         """
         self.food = layout.food.copy()
+        self.foodPositions = frozenset(self.food.asList())
         #self.capsules = []
         self.capsules = layout.capsules[:]
         self.layout = layout
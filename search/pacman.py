@@ -174,7 +174,13 @@ class GameState:
         return self.data.capsules
 
     def getNumFood( self ):
-        return self.data.food.count()
+        return len( self.data.foodPositions )
+
+    def getFoodPositions( self ):
+        """
+        Returns a frozenset of the (x,y) positions that still hold food.
+        """
+        return self.data.foodPositions
 
     def getFood(self):
         """
@@ -359,12 +365,12 @@ class PacmanRules:
     def consume( position, state ):
         x,y = position
         # Eat food
-        if state.data.food[x][y]:
+        if state.data.food.get(x, y):
             state.data.scoreChange += 10
             state.data.food = state.data.food.copy()
             state.data.food[x][y] = False
+            state.data.foodPositions = state.data.foodPositions - frozenset( [position] )
             state.data._foodEaten = position
-            # TODO: cache numFood?
             numFood = state.getNumFood()
             if numFood == 0 and not state.data._lose:
                 state.data.scoreChange += 500
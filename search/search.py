@@ -18,8 +18,8 @@ Pacman agents (in searchAgents.py).
 """
 
 import util
-from collections import defaultdict
 import random
+import time
 
 class SearchProblem:
     """
@@ -74,22 +74,6 @@ def tinyMazeSearch(problem):
     w = Directions.WEST
     return  [s, s, w, s, w, w, s, w]
 
-def dfs_rec(problem, v, l, moves, done):
-    l[v[0]] = True
-
-    if problem.isGoalState(v[0]):
-        done[0] = True
-        moves.insert(0, v[1])
-        return
-    
-    for w in problem.getSuccessors(v[0]):
-        if done[0]:
-            break
-        if w[0] not in l.keys():
-            dfs_rec(problem, w, l, moves, done)
-
-    moves.insert(0, v[1])
-
 def depthFirstSearch(problem):
     """
     Search the deepest nodes in the search tree first.
@@ -102,93 +86,359 @@ def depthFirstSearch(problem):
     """
     
     "*** YOUR CODE HERE ***"
-    
-    moves = []
-    s = []
-    l = {}
-
-    done = [False]
 
-    l[problem.getStartState()] = True
+    # The stack holds (state, iterator over its successors) frames, so the
+    # successors of a state are explored in the order the problem returns
+    # them, exactly as a recursive search would, without recursion limits.
+    start = problem.getStartState()
+    visited = set([start])
+    parent = {}
+    stack = [(start, iter(problem.getSuccessors(start)))]
+    goal = None
 
-    for v in problem.getSuccessors(problem.getStartState()):
-        dfs_rec(problem, v, l, moves, done)
-        if done[0]:
+    while stack:
+        v, successors = stack[-1]
+        for w, action, _ in successors:
+            if w not in visited:
+                break
+        else:
+            stack.pop()
+            continue
+
+        visited.add(w)
+        parent[w] = (v, action)
+        if problem.isGoalState(w):
+            goal = w
             break
+        stack.append((w, iter(problem.getSuccessors(w))))
 
-    return moves
+    if goal is None:
+        return []
 
-def breadthFirstSearch(problem):
-    """Search the shallowest nodes in the search tree first."""
-    "*** YOUR CODE HERE ***"
-    
     moves = []
-    queue = []
-    l = {}
-    parent = {}
-    directions = {}
-    goal = None
-
-    l[problem.getStartState()] = True
-    queue.append(problem.getStartState())
+    while goal in parent:
+        goal, action = parent[goal]
+        moves.append(action)
+    moves.reverse()
 
-    parent[problem.getStartState()] = None
-    directions[problem.getStartState()] = None
-
-    while queue:
-        v = queue.pop(0)
-        if problem.isGoalState(v):
-            goal = v
-            break
-        for w in problem.getSuccessors(v):
-            if w[0] not in l.keys():
-                l[w[0]] = True
-                parent[w[0]] = v
-                queue.append(w[0])
-                directions[w[0]] = w[1]
+    return moves
 
-    while parent[goal]:
-        moves.insert(0, directions[goal])
-        goal = parent[goal]
+# Fields of the per-state node records kept by bestFirstSearch
+NODE_G, NODE_PARENT, NODE_ACTION, NODE_CLOSED = range(4)
 
+def bestFirstSearch(problem, frontier, priority, unitCost=False):
+    """
+    The graph search kernel behind bfs, ucs, astar and wastar.
+
+      frontier: an empty container with push(item, priority), pop() and
+                isEmpty(): util.Queue (FIFO), util.Stack (LIFO),
+                util.PriorityQueue (binary heap) or util.BucketQueue
+      priority: a function (state, g) -> priority of a state reached at
+                path cost g; it is only called when a state is (re)queued
+      unitCost: count every step as 1 instead of its stepCost
+
+    Every state seen gets a single record [g, parent, action, closed] (see
+    the NODE_* indices).  Decrease-key is done by lazy deletion only: a state
+    is pushed again whenever a cheaper path to it is found, even if it was
+    already expanded, and copies that come out of the frontier after their
+    state was expanded are skipped.  The kernel never calls update(), so
+    every frontier works the same way and util.PriorityQueue stays on its
+    plain heapq path.  The goal test happens when a state is dequeued.
+    """
+    start = problem.getStartState()
+    nodes = {start: [0, None, None, False]}
+    frontier.push(start, priority(start, 0))
+
+    while not frontier.isEmpty():
+        state = frontier.pop()
+        node = nodes[state]
+        if node[NODE_CLOSED]:
+            continue
+        if problem.isGoalState(state):
+            return _nodePath(nodes, state)
+        node[NODE_CLOSED] = True
+
+        g = node[NODE_G]
+        for successor, action, stepCost in problem.getSuccessors(state):
+            successorG = g + (1 if unitCost else stepCost)
+            record = nodes.get(successor)
+            if record is None:
+                nodes[successor] = [successorG, state, action, False]
+            elif successorG < record[NODE_G]:
+                record[:] = [successorG, state, action, False]
+            else:
+                continue
+            frontier.push(successor, priority(successor, successorG))
+
+    return []
+
+def _nodePath(nodes, state):
+    "Returns the actions leading from the start to state in a bestFirstSearch record dict"
+    moves = []
+    node = nodes[state]
+    while node[NODE_PARENT] is not None:
+        moves.append(node[NODE_ACTION])
+        node = nodes[node[NODE_PARENT]]
+    moves.reverse()
     return moves
 
+def breadthFirstSearch(problem):
+    """Search the shallowest nodes in the search tree first."""
+    "*** YOUR CODE HERE ***"
+    return bestFirstSearch(problem, util.Queue(), lambda state, g: g, unitCost=True)
+
 def uniformCostSearch(problem):
     """Search the node of least total cost first."""
-    moves = []
-    queue = util.PriorityQueue()
-    explored = []
-    cost = {}
-    cost[problem.getStartState()] = 0
-    queue.push(problem.getStartState(), 0)
-    parent = {}
-    goal = None
-
-    while not queue.isEmpty():
-        v = queue.pop()
-        cost_v = cost[v]
-
-        if problem.isGoalState(v):
-            goal = v
-            break
-
-        if v not in explored:
-            explored.append(v)
+    return bestFirstSearch(problem, util.PriorityQueue(), lambda state, g: g)
 
-            for w in problem.getSuccessors(v):
-                cost_w = cost_v + w[2]
-                if (w[0] not in cost.keys()) or (cost[w[0]] > cost_w):
-                    cost[w[0]] = cost_w
-                    parent[w[0]] = (v, w[1])
-                    queue.push(w[0], cost_w)
+def bidirectionalSearch(problem):
+    """
+    Breadth first search run from the start and from problem.goal at the same
+    time, for single-goal grid problems such as PositionSearchProblem.
+
+    Step costs are ignored, as in breadthFirstSearch, and the returned path
+    has the fewest possible actions.  The backward search generates the
+    predecessors of a cell straight from problem.walls with the four compass
+    moves, plus the four diagonal ones when the problem sets diagonal = True
+    (as jumpPointSearch does), so it assumes every move can be undone.  Each
+    round expands one layer of the side with the smaller frontier; backward
+    expansions are added to problem._expanded (and to the visited-cell display
+    lists when the problem keeps them) like forward ones.
+    searchAgents.mazeDistance uses it on layouts too large for an all-pairs
+    distance table.
+    """
+    from game import Directions, Actions
+    start, goal = problem.getStartState(), problem.goal
+    if start == goal:
+        problem.isGoalState(goal)
+        return []
 
-    while goal != problem.getStartState():
-        v = parent[goal]
-        moves.insert(0, v[1])
-        goal = v[0]
+    walls = problem.walls
+    moves = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+    if getattr(problem, 'diagonal', False):
+        moves += [Directions.NORTHEAST, Directions.NORTHWEST, Directions.SOUTHEAST, Directions.SOUTHWEST]
+    reverseMoves = []
+    for action in moves:
+        dx, dy = Actions.directionToVector(action)
+        reverseMoves.append((int(dx), int(dy), action))
+
+    def predecessors(state):
+        problem._expanded += 1
+        if hasattr(problem, '_visited') and state not in problem._visited:
+            problem._visited[state] = True
+            problem._visitedlist.append(state)
+        x, y = state
+        result = []
+        for dx, dy, action in reverseMoves:
+            previous = (x - dx, y - dy)
+            if not walls[previous[0]][previous[1]]:
+                result.append((previous, action))
+        return result
+
+    # forward[s] = (parent, action into s); backward[s] = (child, action out of s).
+    # Meetings are checked as soon as a cell is generated, so the first one
+    # found closes a shortest path: any shorter one would run through a cell
+    # that both sides had already reached, and would have been seen then.
+    forward, backward = {start: None}, {goal: None}
+    forwardLayer, backwardLayer = [start], [goal]
+    meet = None
+
+    while forwardLayer and backwardLayer and meet is None:
+        nextLayer = []
+        if len(forwardLayer) <= len(backwardLayer):
+            for v in forwardLayer:
+                for w, action, _ in problem.getSuccessors(v):
+                    if w not in forward:
+                        forward[w] = (v, action)
+                        nextLayer.append(w)
+                        if w in backward:
+                            meet = w
+                            break
+                if meet is not None:
+                    break
+            forwardLayer = nextLayer
+        else:
+            for v in backwardLayer:
+                for w, action in predecessors(v):
+                    if w not in backward:
+                        backward[w] = (v, action)
+                        nextLayer.append(w)
+                        if w in forward:
+                            meet = w
+                            break
+                if meet is not None:
+                    break
+            backwardLayer = nextLayer
+
+    if meet is None:
+        return []
+    problem.isGoalState(goal)
 
+    moves = []
+    state = meet
+    while forward[state] is not None:
+        state, action = forward[state]
+        moves.append(action)
+    moves.reverse()
+    state = meet
+    while backward[state] is not None:
+        state, action = backward[state]
+        moves.append(action)
     return moves
 
+def jumpPointSearch(problem):
+    """
+    Jump Point Search: A* over the jump points of a uniform-cost grid, for
+    single-goal problems with a problem.walls Grid and a problem.goal, such as
+    PositionSearchProblem (4-connected) and DiagonalSearchProblem
+    (8-connected, when the problem sets diagonal = True).
+
+    Runs of symmetric cells are skipped by jumping along straight lines (and
+    diagonals) until a cell with a forced neighbor, or the goal, is found; only
+    those jump points are expanded.  Every move must cost 1, so problem.costFn
+    is not consulted.  The jumps are unrolled into the usual list of actions.
+    Expanded jump points are counted in problem._expanded and added to the
+    visited-cell overlay lists, if the problem keeps them.
+    """
+    from game import Directions, Actions
+    walls, goal = problem.walls, problem.goal
+    width, height = walls.width, walls.height
+    diagonal = getattr(problem, 'diagonal', False)
+
+    moves = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+    if diagonal:
+        moves += [Directions.NORTHEAST, Directions.NORTHWEST, Directions.SOUTHEAST, Directions.SOUTHWEST]
+    vectors = {}
+    for action in moves:
+        dx, dy = Actions.directionToVector(action)
+        vectors[(int(dx), int(dy))] = action
+
+    def isOpen(x, y):
+        return 0 <= x < width and 0 <= y < height and not walls.get(x, y)
+
+    def jump(x, y, dx, dy):
+        "Returns the first jump point reached from (x, y) in direction (dx, dy), or None"
+        while True:
+            x += dx
+            y += dy
+            if not isOpen(x, y):
+                return None
+            if (x, y) == goal:
+                return (x, y)
+            if dx and dy:
+                if (isOpen(x - dx, y + dy) and not isOpen(x - dx, y)) or \
+                   (isOpen(x + dx, y - dy) and not isOpen(x, y - dy)):
+                    return (x, y)
+                if jump(x, y, dx, 0) or jump(x, y, 0, dy):
+                    return (x, y)
+            elif diagonal:
+                if dx:
+                    if (isOpen(x + dx, y + 1) and not isOpen(x, y + 1)) or \
+                       (isOpen(x + dx, y - 1) and not isOpen(x, y - 1)):
+                        return (x, y)
+                elif (isOpen(x + 1, y + dy) and not isOpen(x + 1, y)) or \
+                     (isOpen(x - 1, y + dy) and not isOpen(x - 1, y)):
+                    return (x, y)
+            elif dx:
+                if (isOpen(x, y - 1) and not isOpen(x - dx, y - 1)) or \
+                   (isOpen(x, y + 1) and not isOpen(x - dx, y + 1)):
+                    return (x, y)
+            else:
+                if (isOpen(x - 1, y) and not isOpen(x - 1, y - dy)) or \
+                   (isOpen(x + 1, y) and not isOpen(x + 1, y - dy)):
+                    return (x, y)
+                # Vertical runs stop wherever a horizontal jump would succeed
+                if jump(x, y, 1, 0) or jump(x, y, -1, 0):
+                    return (x, y)
+
+    def directions(x, y, parent):
+        "The pruned set of directions to jump in from (x, y), reached from parent"
+        if parent is None:
+            return vectors.keys()
+        dx = cmp(x, parent[0])
+        dy = cmp(y, parent[1])
+        if not diagonal:
+            if dx:
+                return [(dx, 0), (0, 1), (0, -1)]
+            return [(0, dy), (1, 0), (-1, 0)]
+        if dx and dy:
+            result = [(dx, 0), (0, dy), (dx, dy)]
+            if not isOpen(x - dx, y):
+                result.append((-dx, dy))
+            if not isOpen(x, y - dy):
+                result.append((dx, -dy))
+        elif dx:
+            result = [(dx, 0)]
+            if not isOpen(x, y + 1):
+                result.append((dx, 1))
+            if not isOpen(x, y - 1):
+                result.append((dx, -1))
+        else:
+            result = [(0, dy)]
+            if not isOpen(x + 1, y):
+                result.append((1, dy))
+            if not isOpen(x - 1, y):
+                result.append((-1, dy))
+        return result
+
+    def distance(a, b):
+        dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+        if diagonal:
+            return max(dx, dy)
+        return dx + dy
+
+    # point -> [g, parent jump point, closed]
+    start = problem.getStartState()
+    nodes = {start: [0, None, False]}
+    frontier = util.PriorityQueue()
+    frontier.push(start, distance(start, goal))
+    found = False
+
+    while not frontier.isEmpty():
+        point = frontier.pop()
+        node = nodes[point]
+        if node[2]:
+            continue
+        if point == goal:
+            found = True
+            break
+        node[2] = True
+
+        problem._expanded += 1
+        if hasattr(problem, '_visited') and point not in problem._visited:
+            problem._visited[point] = True
+            problem._visitedlist.append(point)
+
+        x, y = point
+        for dx, dy in directions(x, y, node[1]):
+            successor = jump(x, y, dx, dy)
+            if successor is None:
+                continue
+            g = node[0] + distance(point, successor)
+            record = nodes.get(successor)
+            if record is None:
+                nodes[successor] = [g, point, False]
+            elif g < record[0]:
+                record[:] = [g, point, False]
+            else:
+                continue
+            frontier.push(successor, g + distance(successor, goal))
+
+    if not found:
+        return []
+    problem.isGoalState(goal)
+
+    actions = []
+    point = goal
+    while nodes[point][1] is not None:
+        parent = nodes[point][1]
+        dx, dy = cmp(point[0], parent[0]), cmp(point[1], parent[1])
+        steps = max(abs(point[0] - parent[0]), abs(point[1] - parent[1]))
+        actions.extend([vectors[(dx, dy)]] * steps)
+        point = parent
+    actions.reverse()
+    return actions
+
 def nullHeuristic(state, problem=None):
     """
     A heuristic function estimates the cost from the current state to the nearest
@@ -197,46 +447,105 @@ def nullHeuristic(state, problem=None):
 
     return 0
 
-def aStarSearch(problem, heuristic=nullHeuristic):
-    """Search the node that has the lowest combined cost and heuristic first."""
-    "*** YOUR CODE HERE ***"
-
-    openSet = util.PriorityQueue()
-    cameFrom = {}
-
-    gScore = defaultdict(lambda: float('inf'))
-    gScore[problem.getStartState()] = 0
-
-    fScore = defaultdict(lambda: float('inf'))
-    fScore[problem.getStartState()] = heuristic(problem.getStartState(), problem)
-
-    openSet.push(problem.getStartState(), fScore[problem.getStartState()])
-
-    goal = None
-    moves = []
+class MemoizedHeuristic:
+    """
+    Wraps a heuristic(state, problem) so that each state's value is computed
+    once and then read back from an LRU cache of at most 'size' entries.  A
+    search that regenerates a state through another parent then skips the
+    heuristic call.  The wrapper can stand in anywhere a heuristic is expected:
 
-    while not openSet.isEmpty():
-        current = openSet.pop()
+    > search.aStarSearch(problem, search.MemoizedHeuristic(foodHeuristic))
 
-        if problem.isGoalState(current):
-            goal = current
-            break
-    
-        for neighbour in problem.getSuccessors(current):
-            tentativeGScore = gScore[current] + neighbour[2]
+    The cache is emptied whenever the wrapper is called with a different
+    problem.  Only wrap heuristics whose value depends on the state and the
+    problem alone.
+    """
+    def __init__(self, heuristic, size=100000):
+        self.heuristic = heuristic
+        self.cache = util.LRUCache(size)
+        self.problem = None
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, state, problem=None):
+        if problem is not self.problem:
+            self.cache = util.LRUCache(self.cache.capacity)
+            self.problem = problem
+        value = self.cache.get(state)
+        if value is None:
+            self.misses += 1
+            value = self.heuristic(state, problem)
+            self.cache.put(state, value)
+        else:
+            self.hits += 1
+        return value
+
+    def getStats(self):
+        "Returns the hit and miss counts and the number of cached values as a dictionary"
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.cache)}
 
-            if tentativeGScore < gScore[neighbour[0]]:
-                cameFrom[neighbour[0]] = (current, neighbour[1])
-                gScore[neighbour[0]] = tentativeGScore
-                fScore[neighbour[0]] = tentativeGScore + heuristic(neighbour[0], problem)
-                openSet.update(neighbour[0], fScore[neighbour[0]])
+def aStarSearch(problem, heuristic=nullHeuristic):
+    """Search the node that has the lowest combined cost and heuristic first."""
+    "*** YOUR CODE HERE ***"
+    return bestFirstSearch(problem, util.PriorityQueue(),
+                           lambda state, g: g + heuristic(state, problem))
 
-    while goal != problem.getStartState():
-            v = cameFrom[goal]
-            moves.insert(0, v[1])
-            goal = v[0]
+def idaStarSearch(problem, heuristic=nullHeuristic, tableSize=100000):
+    """
+    Iterative-deepening A*: repeated depth first searches that cut off every
+    node whose f = g + h exceeds a bound, the bound growing to the smallest f
+    that was cut off in the previous pass.  The path found is optimal when the
+    heuristic is admissible.
+
+    Apart from the current path, memory is limited to a transposition table
+    of at most tableSize states, mapping a state to the cheapest g it was
+    reached with in the current pass; a state reached again no more cheaply
+    is skipped.  The table is cleared between passes, and tableSize=0 turns
+    it off.
+    """
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return []
+    bound = heuristic(start, problem)
+
+    while True:
+        nextBound = float('inf')
+        table = {start: 0}
+        states, actions = [start], []
+        onPath = set([start])
+        stack = [(0, iter(problem.getSuccessors(start)))]
+
+        while stack:
+            g, successors = stack[-1]
+            for successor, action, stepCost in successors:
+                if successor in onPath:
+                    continue
+                successorG = g + stepCost
+                f = successorG + heuristic(successor, problem)
+                if f > bound:
+                    nextBound = min(nextBound, f)
+                    continue
+                if table.get(successor, float('inf')) <= successorG:
+                    continue
+                if successor in table or len(table) < tableSize:
+                    table[successor] = successorG
+
+                states.append(successor)
+                actions.append(action)
+                onPath.add(successor)
+                if problem.isGoalState(successor):
+                    return actions
+                stack.append((successorG, iter(problem.getSuccessors(successor))))
+                break
+            else:
+                stack.pop()
+                onPath.discard(states.pop())
+                if actions:
+                    actions.pop()
 
-    return moves
+        if nextBound == float('inf'):
+            return []
+        bound = nextBound
 
 def fScoreFunc(g, h, w):
     if g < h:
@@ -247,43 +556,111 @@ def fScoreFunc(g, h, w):
 def weightedAStarSearch(problem, weight = 1.5, heuristic=nullHeuristic):
     """Search the node that has the lowest combined cost and heuristic first."""
     "*** YOUR CODE HERE ***"
+    return bestFirstSearch(problem, util.PriorityQueue(),
+                           lambda state, g: fScoreFunc(g, heuristic(state, problem), weight))
 
-    openSet = util.PriorityQueue()
-    cameFrom = {}
-
-    gScore = defaultdict(lambda: float('inf'))
-    gScore[problem.getStartState()] = 0
-
-    fScore = defaultdict(lambda: float('inf'))
-    fScore[problem.getStartState()] = fScoreFunc(0, heuristic(problem.getStartState(), problem), weight)
-
-    openSet.push(problem.getStartState(), fScore[problem.getStartState()])
-
-    goal = None
-    moves = []
-
-    while not openSet.isEmpty():
-        current = openSet.pop()
-
-        if problem.isGoalState(current):
-            goal = current
-            break
-    
-        for neighbour in problem.getSuccessors(current):
-            tentativeGScore = gScore[current] + neighbour[2]
-
-            if tentativeGScore < gScore[neighbour[0]]:
-                cameFrom[neighbour[0]] = (current, neighbour[1])
-                gScore[neighbour[0]] = tentativeGScore
-                fScore[neighbour[0]] = fScoreFunc(tentativeGScore, heuristic(neighbour[0], problem), weight)
-                openSet.update(neighbour[0], fScore[neighbour[0]])
-
-    while goal != problem.getStartState():
-            v = cameFrom[goal]
-            moves.insert(0, v[1])
-            goal = v[0]
-
-    return moves
+def araStarSearch(problem, heuristic=nullHeuristic, startWeight=3.0, weightStep=0.5, deadline=None):
+    """
+    Anytime Repairing A* (ARA*): a generator of successively better paths.
+
+    Each pass is a weighted A* search ordered by g + weight * h, starting at
+    startWeight and lowering the weight by weightStep down to 1.  Instead of
+    starting over, a pass reuses the g values and parents of the previous one:
+    states whose g improved after they were expanded are kept on an
+    inconsistent list and requeued for the next pass.  After each pass that
+    improves the path, yields (actions, bound) where the path costs at most
+    bound times the optimum; the bound is min(weight, g(goal) / min f) over
+    the queued and inconsistent states, and 1 means the path is optimal.
+
+    deadline is a time.time() value after which no further pass is started
+    or finished, although the first solution is always produced.  Callers may
+    also simply stop iterating.
+    """
+    start = problem.getStartState()
+    nodes = {start: [0, None, None, False]}
+    heuristics = {start: heuristic(start, problem)}
+    weight = max(startWeight, 1.0)
+    openStates = set([start])
+    inconsistent = set()
+    goal = start if problem.isGoalState(start) else None
+    bestCost = None
+
+    def priority(state, g, w):
+        return g + w * heuristics[state]
+
+    while True:
+        frontier = util.PriorityQueue()
+        for state in openStates:
+            frontier.push(state, priority(state, nodes[state][NODE_G], weight))
+        for node in nodes.itervalues():
+            node[NODE_CLOSED] = False
+
+        # ImprovePath: run until no queued state can beat the goal
+        while not frontier.isEmpty():
+            if bestCost is not None and deadline is not None and time.time() > deadline:
+                return
+            state = frontier.pop()
+            node = nodes[state]
+            if node[NODE_CLOSED]:
+                continue
+            if goal is not None and nodes[goal][NODE_G] <= priority(state, node[NODE_G], weight):
+                frontier.push(state, priority(state, node[NODE_G], weight))
+                break
+            openStates.discard(state)
+            node[NODE_CLOSED] = True
+
+            g = node[NODE_G]
+            for successor, action, stepCost in problem.getSuccessors(state):
+                successorG = g + stepCost
+                record = nodes.get(successor)
+                if record is None:
+                    record = nodes[successor] = [successorG, state, action, False]
+                    heuristics[successor] = heuristic(successor, problem)
+                elif successorG < record[NODE_G]:
+                    record[NODE_G], record[NODE_PARENT], record[NODE_ACTION] = successorG, state, action
+                else:
+                    continue
+                if goal is None or successorG < nodes[goal][NODE_G]:
+                    if problem.isGoalState(successor):
+                        goal = successor
+                if record[NODE_CLOSED]:
+                    inconsistent.add(successor)
+                else:
+                    openStates.add(successor)
+                    frontier.push(successor, priority(successor, successorG, weight))
+
+        if goal is None:
+            return
+
+        cost = nodes[goal][NODE_G]
+        lowest = [priority(s, nodes[s][NODE_G], 1.0) for s in openStates | inconsistent]
+        bound = weight
+        if cost == 0 or not lowest:
+            # Step costs are never negative, so an empty path is optimal
+            bound = 1.0
+        elif min(lowest) > 0:
+            bound = min(weight, cost / float(min(lowest)))
+        if bestCost is None or cost < bestCost or bound <= 1.0:
+            bestCost = cost
+            yield _nodePath(nodes, goal), max(bound, 1.0)
+
+        if weight <= 1.0 or bound <= 1.0:
+            return
+        if deadline is not None and time.time() > deadline:
+            return
+        weight = max(1.0, weight - weightStep)
+        openStates |= inconsistent
+        inconsistent = set()
+
+def anytimeAStarSearch(problem, heuristic=nullHeuristic, timeLimit=5.0):
+    """
+    Returns the best path araStarSearch finds within timeLimit seconds (the
+    first solution is always waited for).
+    """
+    path = []
+    for path, bound in araStarSearch(problem, heuristic, deadline=time.time() + timeLimit):
+        pass
+    return path
 
 def randomSearch(problem):
     stack = util.Stack()
@@ -331,4 +708,8 @@ dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
 wastar = weightedAStarSearch
-rs = randomSearch
\ No newline at end of file
+rs = randomSearch
+bibfs = bidirectionalSearch
+jps = jumpPointSearch
+idastar = idaStarSearch
+arastar = anytimeAStarSearch
\ No newline at end of file
@@ -37,8 +37,10 @@ Good luck and happy searching!
 from game import Directions
 from game import Agent
 from game import Actions
+from game import Grid
 import util
 import time
+import array
 import search
 
 class GoWestAgent(Agent):
@@ -69,17 +71,23 @@ class SearchAgent(Agent):
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
 
+    With a heuristic, hcache=N remembers up to N heuristic values by state (see
+    search.MemoizedHeuristic).
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    # Subclasses that set up searchFunction themselves never cache heuristics
+    heuristicCache = None
+
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', hcache='0'):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
         if fn not in dir(search):
             raise AttributeError, fn + ' is not a search function in search.py.'
         func = getattr(search, fn)
+        self.heuristicCache = None
         if 'heuristic' not in func.func_code.co_varnames:
             print('[SearchAgent] using function ' + fn)
             self.searchFunction = func
@@ -91,6 +99,9 @@ class SearchAgent(Agent):
             else:
                 raise AttributeError, heuristic + ' is not a function in searchAgents.py or search.py.'
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
+            if int(hcache) > 0:
+                heur = self.heuristicCache = search.MemoizedHeuristic(heur, int(hcache))
+                print('[SearchAgent] caching up to %d heuristic values' % int(hcache))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
             self.searchFunction = lambda x: func(x, heuristic=heur)
 
@@ -116,6 +127,8 @@ class SearchAgent(Agent):
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if self.heuristicCache != None:
+            print('Heuristic cache hits: %(hits)d, misses: %(misses)d' % self.heuristicCache.getStats())
 
     def getAction(self, state):
         """
@@ -153,6 +166,7 @@ class PositionSearchProblem(search.SearchProblem):
         goal: A position in the gameState
         """
         self.walls = gameState.getWalls()
+        self.neighbors = getNeighbors(self.walls)
         self.startState = gameState.getPacmanPosition()
         if start != None: self.startState = start
         self.goal = goal
@@ -193,14 +207,9 @@ class PositionSearchProblem(search.SearchProblem):
         """
 
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append( ( nextState, action, cost) )
+        for nextState, action in self.neighbors[state]:
+            cost = self.costFn(nextState)
+            successors.append( ( nextState, action, cost) )
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -227,8 +236,16 @@ class PositionSearchProblem(search.SearchProblem):
         return cost
 
 class DiagonalSearchProblem(search.SearchProblem):
+    """
+    A PositionSearchProblem in which Pacman may also move diagonally.
+    """
+
+    # Tells grid searches such as search.jumpPointSearch to use 8-connectivity
+    diagonal = True
+
     def __init__(self, gameState, costFn = lambda x: 1, goal=(1,1), start=None, warn=True, visualize=True):
         self.walls = gameState.getWalls()
+        self.neighbors = getNeighbors(self.walls, self.diagonal)
         self.startState = gameState.getPacmanPosition()
         if start != None: self.startState = start
         self.goal = goal
@@ -268,14 +285,9 @@ class DiagonalSearchProblem(search.SearchProblem):
         """
 
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST, Directions.NORTHEAST, Directions.NORTHWEST, Directions.SOUTHEAST, Directions.SOUTHWEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append( ( nextState, action, cost) )
+        for nextState, action in self.neighbors[state]:
+            cost = self.costFn(nextState)
+            successors.append( ( nextState, action, cost) )
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -351,7 +363,8 @@ class CornersProblem(search.SearchProblem):
     """
     This search problem finds paths through all four corners of a layout.
 
-    You must select a suitable state space and successor function
+    A state is (position, remaining), where bit i of the int 'remaining' is
+    set while self.corners[i] has not been visited.
     """
 
     def __init__(self, startingGameState):
@@ -359,6 +372,7 @@ class CornersProblem(search.SearchProblem):
         Stores the walls, pacman's starting position and corners.
         """
         self.walls = startingGameState.getWalls()
+        self.neighbors = getNeighbors(self.walls)
         self.startingPosition = startingGameState.getPacmanPosition()
         top, right = self.walls.height-2, self.walls.width-2
         self.corners = ((1,1), (1,top), (right, 1), (right, top))
@@ -369,6 +383,11 @@ class CornersProblem(search.SearchProblem):
         # Please add any code here which you would like to use
         # in initializing the problem
         "*** YOUR CODE HERE ***"
+        self.cornerBits = {}
+        for i, corner in enumerate(self.corners):
+            self.cornerBits[corner] = self.cornerBits.get(corner, 0) | (1 << i)
+        self.allCorners = (1 << len(self.corners)) - 1
+        self.heuristicInfo = {} # A dictionary for the heuristic to store information
 
     def getStartState(self):
         """
@@ -376,7 +395,8 @@ class CornersProblem(search.SearchProblem):
         space)
         """
         "*** YOUR CODE HERE ***"
-        return (self.startingPosition, self.corners)
+        remaining = self.allCorners & ~self.cornerBits.get(self.startingPosition, 0)
+        return (self.startingPosition, remaining)
 
     def isGoalState(self, state):
         """
@@ -384,7 +404,7 @@ class CornersProblem(search.SearchProblem):
         """
         "*** YOUR CODE HERE ***"
 
-        return len(state[1]) == 0
+        return state[1] == 0
 
     def getSuccessors(self, state):
         """
@@ -398,19 +418,12 @@ class CornersProblem(search.SearchProblem):
         """
 
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            # Add a successor state to the successor list if the action is legal
-            # Here's a code snippet for figuring out whether a new position hits a wall:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            hitsWall = self.walls[nextx][nexty]
-            if not hitsWall:
-                remainingGoals = tuple(element for element in state[1] if element != (nextx, nexty))
-                nextState = ((nextx, nexty), remainingGoals)
-                cost = 1
-                successors.append((nextState, action, cost))
-            "*** YOUR CODE HERE ***"
+        "*** YOUR CODE HERE ***"
+        for nextPosition, action in self.neighbors[state[0]]:
+            remaining = state[1] & ~self.cornerBits.get(nextPosition, 0)
+            nextState = (nextPosition, remaining)
+            cost = 1
+            successors.append((nextState, action, cost))
 
         self._expanded += 1 # DO NOT CHANGE
         return successors
@@ -446,15 +459,59 @@ def cornersHeuristic(state, problem):
     walls = problem.walls # These are the walls of the maze, as a Grid (game.py)
 
     "*** YOUR CODE HERE ***"
+    # The exact cost of the cheapest tour from here through the remaining
+    # corners, with true maze distances: the distance to the first corner
+    # plus the precomputed best tour from that corner through the rest.
+    # Moves can be undone, so one breadth first search from each corner
+    # gives the distance from any position to it.
+    position, remaining = state
+    if remaining == 0:
+        return 0
+    info = problem.heuristicInfo
+    if 'tours' not in info:
+        info['cornerDistances'] = [distancesFrom(corner, problem.neighbors) for corner in corners]
+        info['tours'] = cornerTours(corners, info['cornerDistances'])
+    cornerDistances, tours = info['cornerDistances'], info['tours']
+    inf = float('inf')
+    return min([cornerDistances[i].get(position, inf) + tours[i][remaining & ~(1 << i)]
+                for i in range(len(corners)) if remaining & (1 << i)])
+
+def distancesFrom(source, neighbors):
+    """
+    Returns a dict mapping every cell reachable from source to its maze
+    distance, by breadth first search over a getNeighbors table.
+    """
+    distances = {source: 0}
+    layer, depth = [source], 0
+    while layer:
+        depth += 1
+        nextLayer = []
+        for cell in layer:
+            for nextCell, action in neighbors.get(cell, ()):
+                if nextCell not in distances:
+                    distances[nextCell] = depth
+                    nextLayer.append(nextCell)
+        layer = nextLayer
+    return distances
+
+def cornerTours(corners, cornerDistances):
+    """
+    Returns tours where tours[i][mask] is the length of the shortest walk that
+    starts at corners[i] and visits every corner whose bit is set in mask.
+    cornerDistances[i] maps cells to their distance from corners[i].
 
-    leng = 0
-
-    x0, y0 = state[0]
-    for element in state[1]:
-        x1, y1 = element
-        leng = max(abs(x1 - x0) + abs(y1 - y0), leng)
-
-    return leng # Default to trivial solution
+    This is the minimum over all orderings of those corners (at most 4! of
+    them), filled in by dynamic programming over masks in increasing order.
+    """
+    n = len(corners)
+    inf = float('inf')
+    between = [[cornerDistances[i].get(b, inf) for b in corners] for i in range(n)]
+    tours = [[0] * (1 << n) for i in range(n)]
+    for mask in range(1, 1 << n):
+        for i in range(n):
+            tours[i][mask] = min([between[i][j] + tours[j][mask & ~(1 << j)]
+                                  for j in range(n) if mask & (1 << j)])
+    return tours
 
 class AStarCornersAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
@@ -474,6 +531,7 @@ class FoodSearchProblem:
     def __init__(self, startingGameState):
         self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
+        self.neighbors = getNeighbors(self.walls)
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
@@ -488,14 +546,10 @@ class FoodSearchProblem:
         "Returns successor states, the actions they require, and a cost of 1."
         successors = []
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
+        for (nextx, nexty), direction in self.neighbors[state[0]]:
+            nextFood = state[1].copy()
+            nextFood[nextx][nexty] = False
+            successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
         return successors
 
     def getCostOfActions(self, actions):
@@ -512,6 +566,56 @@ class FoodSearchProblem:
             cost += 1
         return cost
 
+    def getFoodList(self, state):
+        "Returns the positions of the food remaining in a search state"
+        return state[1].asList()
+
+class FoodBitmaskSearchProblem(FoodSearchProblem):
+    """
+    A FoodSearchProblem with a compact state encoding.
+
+    A search state is a tuple ( pacmanPosition, foodMask ) where foodMask is
+    an int with bit i set while food remains at self.foodCells[i], the food of
+    the starting layout in Grid.asList() order.  Eating a dot clears its bit,
+    the goal test is foodMask == 0 and states hash as a pair of ints, instead
+    of copying, counting and hashing a whole Grid.  getFoodGrid turns a state
+    back into a Grid, e.g. for display.
+    """
+    def __init__(self, startingGameState):
+        FoodSearchProblem.__init__(self, startingGameState)
+        self.foodCells = startingGameState.getFood().asList()
+        self.foodBits = dict((cell, 1 << i) for i, cell in enumerate(self.foodCells))
+        self.start = (startingGameState.getPacmanPosition(), (1 << len(self.foodCells)) - 1)
+
+    def isGoalState(self, state):
+        return state[1] == 0
+
+    def getSuccessors(self, state):
+        "Returns successor states, the actions they require, and a cost of 1."
+        successors = []
+        self._expanded += 1 # DO NOT CHANGE
+        for nextPosition, direction in self.neighbors[state[0]]:
+            nextFood = state[1] & ~self.foodBits.get(nextPosition, 0)
+            successors.append( ( (nextPosition, nextFood), direction, 1) )
+        return successors
+
+    def getFoodList(self, state):
+        "Returns the positions of the food remaining in a search state"
+        foodList = []
+        mask = state[1]
+        while mask:
+            low = mask & -mask
+            foodList.append(self.foodCells[low.bit_length() - 1])
+            mask ^= low
+        return foodList
+
+    def getFoodGrid(self, state):
+        "Returns the food remaining in a search state as a Grid"
+        grid = Grid(self.walls.width, self.walls.height, False)
+        for x, y in self.getFoodList(state):
+            grid[x][y] = True
+        return grid
+
 class AStarFoodSearchAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
     def __init__(self):
@@ -533,7 +637,8 @@ def foodHeuristic(state, problem):
 
     The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
     (see game.py) of either True or False. You can call foodGrid.asList() to get
-    a list of food coordinates instead.
+    a list of food coordinates instead.  problem.getFoodList(state) does the
+    same for both FoodSearchProblem and FoodBitmaskSearchProblem states.
 
     If you want access to info like walls, capsules, etc., you can query the
     problem.  For example, problem.walls gives you a Grid of where the walls
@@ -546,32 +651,53 @@ def foodHeuristic(state, problem):
     Subsequent calls to this heuristic can access
     problem.heuristicInfo['wallCount']
     """
-    position, foodGrid = state
-    minDistance = 99999
-    maxDistance = -1
-    nearestFood = None
-    furthestFood = None
-    
-    for element in foodGrid.asList():
-        distance = mazeDistance(position, element, problem.startingGameState)
-        if distance < minDistance:
-            minDistance = distance
-            nearestFood = element
-        if distance > maxDistance:
-            maxDistance = distance
-            furthestFood = element
-
-    if nearestFood == None and furthestFood == None:
+    # The distance to the nearest dot plus the weight of a minimum spanning
+    # tree over the remaining dots, all in true maze distances.  Any path that
+    # eats every dot first walks to some dot and then covers a spanning tree,
+    # so this never overestimates.  Tree weights depend on the food only and
+    # are kept in an LRU cache keyed by the food part of the state.
+    position = state[0]
+    foodList = problem.getFoodList(state)
+    if not foodList:
+        return 0
+    distances = getMazeDistances(problem.walls)
+    if 'spanningTrees' not in problem.heuristicInfo:
+        problem.heuristicInfo['spanningTrees'] = util.LRUCache(SPANNING_TREE_CACHE_SIZE)
+    trees = problem.heuristicInfo['spanningTrees']
+    treeWeight = trees.get(state[1])
+    if treeWeight is None:
+        treeWeight = spanningTreeWeight(foodList, distances)
+        trees.put(state[1], treeWeight)
+    return min([distances.getDistance(position, food) for food in foodList]) + treeWeight
+
+# The number of food sets whose spanning tree weight foodHeuristic remembers
+SPANNING_TREE_CACHE_SIZE = 50000
+
+def spanningTreeWeight(points, distances):
+    """
+    Returns the total edge length of a minimum spanning tree over points, with
+    the maze distances of a MazeDistances table as edge lengths.  This is
+    Prim's algorithm on the complete graph, quadratic in len(points).
+    """
+    if not points:
         return 0
-    else:
-        return minDistance + mazeDistance(nearestFood, furthestFood, problem.startingGameState)
+    reach = dict((point, distances.getDistance(points[0], point)) for point in points[1:])
+    total = 0
+    while reach:
+        nearest = min(reach, key=reach.get)
+        total += reach.pop(nearest)
+        for point in reach:
+            distance = distances.getDistance(nearest, point)
+            if distance < reach[point]:
+                reach[point] = distance
+    return total
 
 class ClosestDotSearchAgent(SearchAgent):
     "Search for all food using a sequence of searches"
     def registerInitialState(self, state):
         self.actions = []
         currentState = state
-        while(currentState.getFood().count() > 0):
+        while(currentState.getNumFood() > 0):
             nextPathSegment = self.findPathToClosestDot(currentState) # The missing piece
             self.actions += nextPathSegment
             for action in nextPathSegment:
@@ -619,6 +745,7 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
         # Store info for the PositionSearchProblem (no need to change this)
         self.walls = gameState.getWalls()
+        self.neighbors = getNeighbors(self.walls)
         self.startState = gameState.getPacmanPosition()
         self.costFn = lambda x: 1
         self._visited, self._visitedlist, self._expanded = {}, [], 0 # DO NOT CHANGE
@@ -642,11 +769,123 @@ def mazeDistance(point1, point2, gameState):
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
     This might be a useful helper function for your ApproximateSearchAgent.
+
+    The distance is read from the all-pairs table of the layout (see
+    getMazeDistances), which is built on the first call for a given set of
+    walls.  Layouts with more than MAZE_DISTANCE_TABLE_CELLS open cells, whose
+    table would be too large, get a bidirectional breadth first search per
+    call instead.  Unreachable points are float('inf') apart.
     """
     x1, y1 = point1
     x2, y2 = point2
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
+    if walls.count(False) <= MAZE_DISTANCE_TABLE_CELLS:
+        return getMazeDistances(walls).getDistance(point1, point2)
+    if point1 == point2:
+        return 0
     prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    path = search.bidirectionalSearch(prob)
+    if not path:
+        return float('inf')
+    return len(path)
+
+# mazeDistance only builds all-pairs tables (cells * cells entries) up to this size
+MAZE_DISTANCE_TABLE_CELLS = 2000
+
+class MazeDistances:
+    """
+    All-pairs shortest path lengths between the open cells of a layout.
+
+    The open cells are numbered and the distances kept in one flat
+    array.array of cells * cells unsigned integers, filled by a breadth first
+    search from every cell.  That is quadratic in the number of open cells in
+    both time and memory, which is fine for the layouts shipped here (at most
+    a few hundred open cells, i.e. well under a megabyte).
+    """
+
+    def __init__(self, walls):
+        self.walls = walls
+        self.cells = walls.asList(False)
+        self.index = dict((cell, i) for i, cell in enumerate(self.cells))
+        n = len(self.cells)
+        self.unreachable = 0xFFFF if n < 0xFFFF else 0xFFFFFFFF
+        typecode = 'H' if n < 0xFFFF else 'I'
+        self.distances = array.array(typecode, [self.unreachable]) * (n * n)
+
+        neighbors = []
+        for x, y in self.cells:
+            adjacent = []
+            for nextCell in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+                if nextCell in self.index:
+                    adjacent.append(self.index[nextCell])
+            neighbors.append(adjacent)
+
+        distances = self.distances
+        for source in xrange(n):
+            row = source * n
+            distances[row + source] = 0
+            layer, depth = [source], 0
+            while layer:
+                depth += 1
+                nextLayer = []
+                for v in layer:
+                    for w in neighbors[v]:
+                        if distances[row + w] == self.unreachable:
+                            distances[row + w] = depth
+                            nextLayer.append(w)
+                layer = nextLayer
+
+    def getDistance(self, point1, point2):
+        "Returns the maze distance between two open cells, float('inf') if they are not connected"
+        d = self.distances[self.index[point1] * len(self.cells) + self.index[point2]]
+        if d == self.unreachable:
+            return float('inf')
+        return d
+
+_mazeDistancesCache = {}
+_lastMazeDistances = [None, None]
+
+def getMazeDistances(walls):
+    """
+    Returns the MazeDistances table for a walls Grid, building it the first
+    time a layout with these walls is seen.  Tables are kept per wall layout
+    for the life of the process; the last one used is also remembered by
+    identity so that repeated lookups skip hashing the grid.
+    """
+    if _lastMazeDistances[0] is walls:
+        return _lastMazeDistances[1]
+    table = _mazeDistancesCache.get(walls)
+    if table is None:
+        table = _mazeDistancesCache[walls] = MazeDistances(walls)
+    _lastMazeDistances[:] = [walls, table]
+    return table
+
+_neighborsCache = {}
+
+def getNeighbors(walls, diagonal=False):
+    """
+    Returns the neighbor table for a walls Grid: a dict mapping every open
+    cell to a tuple of (neighbor, action) pairs for the legal moves out of it,
+    in the order NORTH, SOUTH, EAST, WEST, followed by NORTHEAST, NORTHWEST,
+    SOUTHEAST and SOUTHWEST if diagonal is true.  Like getMazeDistances, the
+    tables are built once per wall layout and kept for the life of the process.
+    """
+    key = (walls, diagonal)
+    table = _neighborsCache.get(key)
+    if table is None:
+        actions = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+        if diagonal:
+            actions += [Directions.NORTHEAST, Directions.NORTHWEST, Directions.SOUTHEAST, Directions.SOUTHWEST]
+        table = {}
+        for x, y in walls.asList(False):
+            neighbors = []
+            for action in actions:
+                dx, dy = Actions.directionToVector(action)
+                nextx, nexty = int(x + dx), int(y + dy)
+                if 0 <= nextx < walls.width and 0 <= nexty < walls.height and not walls.get(nextx, nexty):
+                    neighbors.append(((nextx, nexty), action))
+            table[(x, y)] = tuple(neighbors)
+        _neighborsCache[key] = table
+    return table
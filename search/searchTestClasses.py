@@ -819,3 +819,44 @@ class CornerHeuristicPacman(testClasses.TestCase):
         handle.close()
         return True
 
+
+class SearchAgentTest(testClasses.TestCase):
+    """
+    Builds the agent named by 'agent' with no arguments, as pacman.py -p does,
+    lets it plan on the layout in registerInitialState and checks the length
+    of the path it found.
+    """
+
+    def __init__(self, question, testDict):
+        super(SearchAgentTest, self).__init__(question, testDict)
+        self.layout_text = testDict['layout']
+        self.agentName = testDict['agent']
+
+    def getPath(self, searchAgents):
+        lay = layout.Layout([l.strip() for l in self.layout_text.split('\n')])
+        game_state = pacman.GameState()
+        game_state.initialize(lay, 0)
+        agent = getattr(searchAgents, self.agentName)()
+        agent.registerInitialState(game_state)
+        return agent.actions
+
+    def execute(self, grades, moduleDict, solutionDict):
+        searchAgents = moduleDict['searchAgents']
+        path = self.getPath(searchAgents)
+        true_cost = int(solutionDict['cost'])
+        if len(path) != true_cost:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s found a path of length %d, expected %d' % (self.agentName, len(path), true_cost))
+            return False
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\t%s found a path of length %d' % (self.agentName, len(path)))
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        searchAgents = moduleDict['searchAgents']
+        handle = open(filePath, 'w')
+        handle.write('# This solution file specifies the length of the path\n')
+        handle.write('# the agent plans from the start of the layout.\n')
+        handle.write('cost: "%d"\n' % len(self.getPath(searchAgents)))
+        handle.close()
+        return True
@@ -30,6 +30,7 @@ import sys
 import inspect
 import heapq, random
 import cStringIO
+from collections import deque, OrderedDict
 
 
 class FixedRandom:
@@ -136,8 +137,8 @@ class Stack:
     def __init__(self):
         self.list = []
 
-    def push(self,item):
-        "Push 'item' onto the stack"
+    def push(self,item,priority=None):
+        "Push 'item' onto the stack; 'priority' is accepted and ignored"
         self.list.append(item)
 
     def pop(self):
@@ -149,20 +150,24 @@ class Stack:
         return len(self.list) == 0
 
 class Queue:
-    "A container with a first-in-first-out (FIFO) queuing policy."
+    """
+      A container with a first-in-first-out (FIFO) queuing policy.
+
+      Backed by a collections.deque, so push and pop are both O(1).
+    """
     def __init__(self):
-        self.list = []
+        self.list = deque()
 
-    def push(self,item):
-        "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+    def push(self,item,priority=None):
+        "Enqueue the 'item' into the queue; 'priority' is accepted and ignored"
+        self.list.append(item)
 
     def pop(self):
         """
           Dequeue the earliest enqueued item still in the queue. This
           operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.list.popleft()
 
     def isEmpty(self):
         "Returns true if the queue is empty"
@@ -174,19 +179,57 @@ class PriorityQueue:
       has a priority associated with it and the client is usually interested
       in quick retrieval of the lowest-priority item in the queue. This
       data structure allows O(1) access to the lowest-priority item.
+
+      push() always adds an entry, so an item pushed twice is popped twice
+      and items need not be hashable.  Ties are broken by insertion order.
+      Until update() is first called, push and pop are plain heapq calls.
+
+      The first update() indexes the heap: from then on self.index maps the
+      first queued entry of each hashable item to its slot in self.heap, and
+      push and pop keep it current, so update() is a true O(log n)
+      decrease-key instead of a linear scan followed by a heapify.
+      Unhashable items are still found by the scan.  A decrease-key keeps the
+      original insertion stamp of the entry.  Further copies of an item pushed
+      while it is queued are not indexed; update() leaves them alone.
+
+      The queue counts its decrease-keys in numDecreaseKeys; pushes and
+      pops follow from the insertion stamp and the heap size (see getStats).
     """
     def  __init__(self):
         self.heap = []
+        self.index = None
         self.count = 0
+        self.numDecreaseKeys = 0
 
     def push(self, item, priority):
-        entry = (priority, self.count, item)
-        heapq.heappush(self.heap, entry)
+        # Entries are (priority, stamp, item), plus an 'indexed' flag once
+        # update() has been used; the unique stamp keeps comparisons from
+        # ever reaching the item
+        if self.index is None:
+            heapq.heappush(self.heap, (priority, self.count, item))
+        else:
+            try:
+                indexed = item not in self.index
+            except TypeError:
+                indexed = False
+            self.heap.append((priority, self.count, item, indexed))
+            self._siftUp(len(self.heap) - 1)
         self.count += 1
 
     def pop(self):
-        (_, _, item) = heapq.heappop(self.heap)
-        return item
+        if self.index is None:
+            return heapq.heappop(self.heap)[2]
+        heap = self.heap
+        last = heap.pop()
+        if heap:
+            entry = heap[0]
+            heap[0] = last
+            self._siftDown(0)
+        else:
+            entry = last
+        if entry[3]:
+            del self.index[entry[2]]
+        return entry[2]
 
     def isEmpty(self):
         return len(self.heap) == 0
@@ -195,16 +238,123 @@ class PriorityQueue:
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
         # If item not in priority queue, do the same thing as self.push.
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
-                break
-        else:
+        if self.index is None:
+            self._buildIndex()
+        try:
+            pos = self.index.get(item)
+        except TypeError:
+            pos = self._find(item)
+        if pos is None:
             self.push(item, priority)
+            return
+        (p, c, _, indexed) = self.heap[pos]
+        if p <= priority:
+            return
+        self.heap[pos] = (priority, c, item, indexed)
+        self.numDecreaseKeys += 1
+        self._siftUp(pos)
+
+    def getStats(self):
+        "Returns the push, pop and decrease-key counts as a dictionary"
+        return {'pushes': self.count, 'pops': self.count - len(self.heap),
+                'decreaseKeys': self.numDecreaseKeys}
+
+    def _buildIndex(self):
+        "Indexes the earliest queued entry of each hashable item, for update()"
+        heap, index = self.heap, {}
+        for pos, entry in enumerate(heap):
+            heap[pos] = entry + (False,)
+            try:
+                first = index.get(entry[2])
+            except TypeError:
+                continue
+            if first is None or heap[first][1] > entry[1]:
+                index[entry[2]] = pos
+        for pos in index.itervalues():
+            heap[pos] = heap[pos][:3] + (True,)
+        self.index = index
+
+    def _find(self, item):
+        "Returns the slot of the first heap entry holding item, or None"
+        for pos, entry in enumerate(self.heap):
+            if entry[2] == item:
+                return pos
+        return None
+
+    def _siftUp(self, pos):
+        heap, index = self.heap, self.index
+        entry = heap[pos]
+        while pos > 0:
+            parentPos = (pos - 1) >> 1
+            parent = heap[parentPos]
+            if entry < parent:
+                heap[pos] = parent
+                if parent[3]:
+                    index[parent[2]] = pos
+                pos = parentPos
+            else:
+                break
+        heap[pos] = entry
+        if entry[3]:
+            index[entry[2]] = pos
+
+    def _siftDown(self, pos):
+        heap, index = self.heap, self.index
+        size = len(heap)
+        entry = heap[pos]
+        child = 2 * pos + 1
+        while child < size:
+            right = child + 1
+            if right < size and heap[right] < heap[child]:
+                child = right
+            if heap[child] < entry:
+                heap[pos] = heap[child]
+                if heap[pos][3]:
+                    index[heap[pos][2]] = pos
+                pos = child
+                child = 2 * pos + 1
+            else:
+                break
+        heap[pos] = entry
+        if entry[3]:
+            index[entry[2]] = pos
+
+class BucketQueue:
+    """
+      A priority queue that keeps one FIFO bucket per distinct priority and a
+      small heap of the priorities that have a non-empty bucket.  Pushes to an
+      existing bucket are O(1) and pops are O(1) until a bucket empties, which
+      makes it fast for the few distinct integer priorities of unit-cost grid
+      searches.  Ties are broken in insertion order, like PriorityQueue.
+
+      There is no decrease-key: pushing an item twice queues it twice, so the
+      caller has to skip the stale copy when it comes out.
+    """
+    def  __init__(self):
+        self.buckets = {}
+        self.priorities = []
+        self.size = 0
+
+    def push(self, item, priority):
+        bucket = self.buckets.get(priority)
+        if bucket is None:
+            bucket = self.buckets[priority] = deque()
+            heapq.heappush(self.priorities, priority)
+        bucket.append(item)
+        self.size += 1
+
+    def pop(self):
+        priority = self.priorities[0]
+        bucket = self.buckets[priority]
+        item = bucket.popleft()
+        if not bucket:
+            del self.buckets[priority]
+            heapq.heappop(self.priorities)
+        self.size -= 1
+        return item
+
+    def isEmpty(self):
+        return self.size == 0
 
 class PriorityQueueWithFunction(PriorityQueue):
     """
@@ -212,6 +362,8 @@ class PriorityQueueWithFunction(PriorityQueue):
     Queue and the Stack classes. This is designed for drop-in replacement for
     those two classes. The caller has to provide a priority function, which
     extracts each item's priority.
+
+    Like PriorityQueue.push, push adds an entry every time it is called.
     """
     def  __init__(self, priorityFunction):
         "priorityFunction (item) -> priority"
@@ -222,6 +374,37 @@ class PriorityQueueWithFunction(PriorityQueue):
         "Adds an item to the queue with priority from the priority function"
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
+class LRUCache:
+    """
+      A dictionary that holds at most 'capacity' entries.  When it is full,
+      storing a new key evicts the least recently stored or fetched entry.
+    """
+    def  __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def get(self, key, default=None):
+        "Returns the value stored for key (marking it recently used), or default"
+        try:
+            value = self.entries.pop(key)
+        except KeyError:
+            return default
+        self.entries[key] = value
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            del self.entries[key]
+        elif len(self.entries) >= self.capacity:
+            self.entries.popitem(last=False)
+        self.entries[key] = value
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
 
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"